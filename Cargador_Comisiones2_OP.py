@@ -1,5 +1,6 @@
 import os
 import re
+import time
 import numpy as np
 import pandas as pd
 import pyodbc
@@ -10,6 +11,20 @@ from datetime import datetime
 # Para leer XLSB
 from pyxlsb import open_workbook
 
+# Sanitizadores, filtro de duplicados y periodo semanal compartidos (comisiones_comun.py, mismo directorio)
+from comisiones_comun import to_num_or_none, to_str_or_none, FiltroDuplicados, fila_sin_duplicar, periodo_semana
+
+# Helpers SQL compartidos por los tres cargadores (comisiones_sql.py, mismo directorio)
+from comisiones_sql import (
+    obtener_conexion, devolver_conexion, estimar_ancho_fila, LoteAdaptativo, columnas_parametros,
+    parametros_lote, guardar_checkpoint, borrar_checkpoint, tabla_resumen,
+    preparar_resumen, acumular_resumen,
+)
+
+# Respaldo e interfaz compartidos (comisiones_respaldo.py / comisiones_ui.py, mismo directorio)
+from comisiones_respaldo import RESPALDO_OPCIONES, iniciar_respaldo, esperar_respaldo
+from comisiones_ui import bloquear_controles, reflejar_en_espejo, preguntar_reanudar
+
 # Para logo (Pillow)
 from PIL import Image, ImageTk
 
@@ -47,31 +62,6 @@ def limpiar_fecha_sql_datetime(x):
     except:
         return None
 
-def to_num_or_none(x):
-    try:
-        if x is None or pd.isna(x):
-            return None
-    except:
-        pass
-    try:
-        v = pd.to_numeric(x, errors="coerce")
-        if pd.isna(v) or v in (np.inf, -np.inf):
-            return None
-        return float(v)
-    except:
-        return None
-
-def to_str_or_none(x):
-    try:
-        if x is None or pd.isna(x):
-            return None
-    except:
-        pass
-    s = str(x).strip()
-    if s == "" or s.lower() in ("nan", "none"):
-        return None
-    return s
-
 
 # =========================
 # Columna Archivo desde nombre (con AJUSTE al final)
@@ -110,11 +100,47 @@ def formatear_archivo_desde_nombre(ruta, tipo_archivo):
     return f"{mes_completo} {anio} SEM {int(semana):02d} - {tipo_formateado}"
 
 
+# =========================
+# Esquema de dbo.Datos_Comisiones_* (también lo usa provisionar_tablas.py para el DDL)
+# =========================
+TABLAS_COMISIONES = {
+    "INICIALES": "dbo.Datos_Comisiones_Iniciales",
+    "PERMANENCIA": "dbo.Datos_Comisiones_Permanencia",
+    "PERMANENCIA 2": "dbo.Datos_Comisiones_Permanencia",
+    "RECARGAS": "dbo.Datos_Comisiones_Recargas"
+}
+
+COLUMNAS_SQL = {
+    "Linea": "BIGINT",
+    "Fecha_Portacion": "DATETIME",
+    "Estatus_Comision": "NVARCHAR(255)",
+    "Motivo_Rechazo": "NVARCHAR(255)",
+    "Tipo_Comision": "NVARCHAR(255)",
+    "Monto": "DECIMAL(18, 2)",
+    "Fuerza_Venta": "NVARCHAR(255)",
+    "Periodo_Participacion": "INT",
+    "Region_Registro": "INT",
+    "Num_Promotor": "BIGINT",
+    "Promotor": "NVARCHAR(255)",
+    "Num_Supervisor": "BIGINT",
+    "Nombre_Supervisor": "NVARCHAR(255)",
+    "Grupo": "NVARCHAR(255)",
+    "Num_Coord": "BIGINT",
+    "Nombre_Coord": "NVARCHAR(255)",
+    "Archivo": "NVARCHAR(255)"
+}
+
+# Llave de partición semanal (periodo_semana en comisiones_comun.py).
+# Solo existe en tablas provisionadas; la expresión SQL equivalente está en provisionar_tablas.py.
+COLUMNA_PERIODO = "Periodo_Semana"
+
+
 # =========================
 # TXT -> DataFrame (formato final 17 columnas)
 # =========================
-def txt_a_dataframe(ruta_txt, tipo_archivo):
+def txt_a_dataframe(ruta_txt, tipo_archivo, quitar_duplicados=False):
     archivo_formateado = formatear_archivo_desde_nombre(ruta_txt, tipo_archivo)
+    filtro = FiltroDuplicados(quitar_duplicados)
 
     rows = []
     with open(ruta_txt, encoding="latin1", errors="replace") as f:
@@ -135,16 +161,19 @@ def txt_a_dataframe(ruta_txt, tipo_archivo):
             linea = to_num_or_none(parts[0])
             if linea is None:
                 continue
+            llave = (linea, to_num_or_none(parts[10]), to_str_or_none(parts[5]))
+            if not filtro.es_nuevo(llave):
+                continue
 
             rows.append({
                 "Linea": linea,
                 "Fecha_Portacion": limpiar_fecha_sql_datetime(parts[1]),
                 "Estatus_Comision": to_str_or_none(parts[3]),
                 "Motivo_Rechazo": to_str_or_none(parts[4]),
-                "Tipo_Comision": to_str_or_none(parts[5]),
+                "Tipo_Comision": llave[2],
                 "Monto": to_num_or_none(parts[6]),
                 "Fuerza_Venta": to_str_or_none(parts[7]),
-                "Periodo_Participacion": to_num_or_none(parts[10]),
+                "Periodo_Participacion": llave[1],
                 "Region_Registro": to_num_or_none(parts[13]),
                 "Num_Promotor": to_num_or_none(parts[14]),
                 "Promotor": to_str_or_none(parts[15]),
@@ -156,14 +185,15 @@ def txt_a_dataframe(ruta_txt, tipo_archivo):
                 "Archivo": archivo_formateado
             })
 
-    return pd.DataFrame(rows)
+    return filtro.terminar(pd.DataFrame(rows))
 
 
 # =========================
 # XLSB -> DataFrame (se deja IGUAL que TXT: 17 columnas)
 # =========================
-def xlsb_a_dataframe(ruta_xlsb, tipo_archivo):
+def xlsb_a_dataframe(ruta_xlsb, tipo_archivo, quitar_duplicados=False):
     archivo_formateado = formatear_archivo_desde_nombre(ruta_xlsb, tipo_archivo)
+    filtro = FiltroDuplicados(quitar_duplicados)
 
     with open_workbook(ruta_xlsb) as wb:
         with wb.get_sheet(1) as sheet:
@@ -171,14 +201,17 @@ def xlsb_a_dataframe(ruta_xlsb, tipo_archivo):
             try:
                 header_row = next(it)
             except StopIteration:
-                return pd.DataFrame()
+                return filtro.terminar(pd.DataFrame())
 
             headers = [str(c.v).strip() if c.v is not None else "" for c in header_row]
             headers_norm = [h.strip().lower() for h in headers]
 
+            es_nueva = fila_sin_duplicar(filtro, headers_norm)
             data_rows = []
             for row in it:
-                data_rows.append([c.v for c in row])
+                vals = [c.v for c in row]
+                if es_nueva(vals):
+                    data_rows.append(vals)
 
     df_raw = pd.DataFrame(data_rows, columns=headers_norm)
 
@@ -211,53 +244,14 @@ def xlsb_a_dataframe(ruta_xlsb, tipo_archivo):
         df["Nombre_Coord"] = df_raw["nombre_coord"].map(to_str_or_none)
 
     df = df[df["Linea"].notna()].copy()
-    return df
-
-
-# =========================
-# Excel rápido con XlsxWriter
-# =========================
-def guardar_excel_rapido(df, ruta_excel):
-    with pd.ExcelWriter(ruta_excel, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name="Datos")
-
-        wb = writer.book
-        ws = writer.sheets["Datos"]
-
-        header_fmt = wb.add_format({
-            "bold": True,
-            "font_name": "Arial",
-            "font_size": 12,
-            "align": "center",
-            "valign": "vcenter",
-            "text_wrap": True,
-            "border": 1
-        })
-
-        body_fmt = wb.add_format({
-            "font_name": "Arial",
-            "font_size": 12,
-            "valign": "vcenter"
-        })
-
-        for col, name in enumerate(df.columns):
-            ws.write(0, col, name, header_fmt)
-
-        ws.set_column(0, len(df.columns) - 1, 22, body_fmt)
-        ws.freeze_panes(1, 0)
-        ws.autofilter(0, 0, len(df), len(df.columns) - 1)
+    return filtro.terminar(df)
 
 
 # =========================
 # Insertar SQL rápido
 # =========================
-def insertar_en_sql(df, tipo_archivo, password):
-    tabla_destino = {
-        "INICIALES": "dbo.Datos_Comisiones_Iniciales",
-        "PERMANENCIA": "dbo.Datos_Comisiones_Permanencia",
-        "PERMANENCIA 2": "dbo.Datos_Comisiones_Permanencia",
-        "RECARGAS": "dbo.Datos_Comisiones_Recargas"
-    }[tipo_archivo]
+def insertar_en_sql(df, tipo_archivo, password, ruta=None):
+    tabla_destino = TABLAS_COMISIONES[tipo_archivo]
 
     conn_str = (
         "DRIVER={ODBC Driver 17 for SQL Server};"
@@ -267,8 +261,10 @@ def insertar_en_sql(df, tipo_archivo, password):
         "TrustServerCertificate=Yes;"
     )
 
+    total = len(df)
+
     try:
-        conn = pyodbc.connect(conn_str, autocommit=False)
+        conn = obtener_conexion(conn_str)
     except pyodbc.Error as e:
         if "Login failed for user" in str(e):
             messagebox.showerror("CONTRASEÑA INCORRECTA", "❌ La contraseña ingresada es incorrecta para el usuario 'sa'.")
@@ -278,65 +274,80 @@ def insertar_en_sql(df, tipo_archivo, password):
 
     cursor = conn.cursor()
     cursor.fast_executemany = True
+    # el checkpoint vive en SQL: se consulta con la conexión ya abierta
+    clave, inicio = preguntar_reanudar(cursor, ruta, tabla_destino, total)
 
-    columnas_sql = [
-        "Linea","Fecha_Portacion","Estatus_Comision","Motivo_Rechazo","Tipo_Comision",
-        "Monto","Fuerza_Venta","Periodo_Participacion","Region_Registro","Num_Promotor",
-        "Promotor","Num_Supervisor","Nombre_Supervisor","Grupo","Num_Coord","Nombre_Coord","Archivo"
-    ]
+    columnas_sql = list(COLUMNAS_SQL)
+
+    # tablas particionadas por provisionar_tablas.py: la llave semanal la calcula el cargador
+    cursor.execute("SELECT COL_LENGTH(?, ?)", tabla_destino, COLUMNA_PERIODO)
+    if cursor.fetchone()[0] is not None:
+        df = df.assign(**{COLUMNA_PERIODO: df["Archivo"].map(periodo_semana)})
+        columnas_sql.append(COLUMNA_PERIODO)
 
     df = df[columnas_sql].copy()
     df = df.replace([np.inf, -np.inf], np.nan)
     df = df.where(pd.notnull(df), None)
 
-    data = df.to_numpy(dtype=object)
-    data[(data != data)] = None
-    values = list(map(tuple, data))
+    columnas = columnas_parametros(df)
 
-    total = len(values)
     progress_bar["maximum"] = max(total, 1)
-    progress_bar["value"] = 0
+    progress_bar["value"] = inicio
 
     placeholders = ",".join(["?"] * len(columnas_sql))
     cols = ",".join(columnas_sql)
     sql = f"INSERT INTO {tabla_destino} ({cols}) VALUES ({placeholders})"
 
-    CHUNK = 5000
+    lote = LoteAdaptativo(estimar_ancho_fila(columnas))
+    start = inicio
+    tabla_res = tabla_resumen(tabla_destino)
 
     try:
-        for start in range(0, total, CHUNK):
+        preparar_resumen(cursor, tabla_res)
+
+        while start < total:
             if cancelar:
-                label_progreso.config(text="🚫 Carga cancelada por el usuario.", fg="#c0392b")
-                conn.rollback()
-                conn.close()
+                label_progreso.config(text=f"🚫 Carga cancelada por el usuario ({start} de {total} cargados; se puede reanudar).", fg="#c0392b")
+                devolver_conexion(conn_str, conn)
                 return False
 
-            end = min(start + CHUNK, total)
-            cursor.executemany(sql, values[start:end])
+            end = min(start + lote.tamano, total)
+            t0 = time.perf_counter()
+            cursor.executemany(sql, parametros_lote(columnas, start, end))
+            acumular_resumen(cursor, tabla_res, df.iloc[start:end])
+            if clave:
+                # mismo commit que el lote: filas y avance se confirman juntos
+                guardar_checkpoint(cursor, clave, {"tabla": tabla_destino, "total": total, "filas_confirmadas": end})
             conn.commit()
+            lote.registrar(end - start, time.perf_counter() - t0)
+            start = end
 
             progress_bar["value"] = end
-            label_progreso.config(text=f"Insertando registro {end} de {total}...")
+            label_progreso.config(text=f"Insertando registro {end} de {total}... (lote de {lote.tamano:,} filas)")
             ventana.update_idletasks()
 
+        if clave:
+            borrar_checkpoint(cursor, clave)
+            conn.commit()
+
     except Exception as e:
-        conn.rollback()
-        conn.close()
+        devolver_conexion(conn_str, conn, rota=True)
         raise e
 
-    conn.close()
+    devolver_conexion(conn_str, conn)
+    reflejar_en_espejo(df, tabla_destino, label_progreso, ventana)
     return True
 
 
 # =========================
 # Procesamiento por extensión
 # =========================
-def construir_df_desde_archivo(ruta, tipo_archivo):
+def construir_df_desde_archivo(ruta, tipo_archivo, quitar_duplicados=False):
     ext = os.path.splitext(ruta)[1].lower()
     if ext == ".txt":
-        return txt_a_dataframe(ruta, tipo_archivo)
+        return txt_a_dataframe(ruta, tipo_archivo, quitar_duplicados)
     if ext == ".xlsb":
-        return xlsb_a_dataframe(ruta, tipo_archivo)
+        return xlsb_a_dataframe(ruta, tipo_archivo, quitar_duplicados)
     raise ValueError("Solo se aceptan archivos .txt o .xlsb")
 
 
@@ -364,30 +375,42 @@ def procesar_archivo():
         messagebox.showerror("Error", "Por favor completa todos los campos.")
         return
 
+    bloquear_controles(True, btn_subir, btn_buscar)
     try:
         label_progreso.config(text="Procesando archivo...", fg="#1f4e79")
         ventana.update_idletasks()
 
-        df = construir_df_desde_archivo(ruta, tipo)
+        df = construir_df_desde_archivo(ruta, tipo, var_duplicados.get())
+        duplicados = df.attrs.get("duplicados", 0)
         if df.empty:
             messagebox.showerror("Error", "El archivo no generó registros válidos.")
             return
 
-        ruta_excel = os.path.splitext(ruta)[0] + "_FORMATEADO.xlsx"
-        guardar_excel_rapido(df, ruta_excel)
+        # el respaldo se escribe en paralelo con la carga a SQL
+        respaldo = iniciar_respaldo(df, ruta, combo_respaldo.get())
 
         label_progreso.config(text="Cargando a SQL Server...", fg="#1f4e79")
         ventana.update_idletasks()
 
-        ok = insertar_en_sql(df, tipo, pwd)
+        ok = insertar_en_sql(df, tipo, pwd, ruta=ruta)
+
+        if respaldo["hilo"].is_alive():
+            label_progreso.config(text="Terminando respaldo...", fg="#1f4e79")
+        esperar_respaldo(respaldo, ventana)
+        if respaldo["error"]:
+            messagebox.showwarning("Respaldo", f"No se pudo generar el respaldo:\n{respaldo['error']}")
         if not ok:
             return
 
         label_progreso.config(text="✅ ¡Carga completada!", fg="#1e7e34")
-        messagebox.showinfo("Éxito", f"Excel generado:\n{ruta_excel}\n\nRegistros cargados: {len(df)}")
+        resp_txt = f"Respaldo generado:\n{respaldo['ruta']}" if respaldo["ruta"] else "Sin respaldo"
+        dup_txt = f"\nDuplicados descartados: {duplicados:,}" if var_duplicados.get() else ""
+        messagebox.showinfo("Éxito", f"{resp_txt}\n\nRegistros cargados: {len(df)}{dup_txt}")
 
     except Exception as e:
         messagebox.showerror("Error", str(e))
+    finally:
+        bloquear_controles(False, btn_subir, btn_buscar)
 
 
 # ============================================================
@@ -475,10 +498,19 @@ combo_tipo = ttk.Combobox(card, values=["INICIALES", "PERMANENCIA", "PERMANENCIA
                           state="readonly")
 combo_tipo.grid(row=1, column=1, sticky="ew", padx=10, pady=10)
 
+combo_respaldo = ttk.Combobox(card, values=RESPALDO_OPCIONES, state="readonly", width=16)
+combo_respaldo.set(RESPALDO_OPCIONES[0])
+combo_respaldo.grid(row=1, column=2, padx=10, pady=10, sticky="e")
+
 # Row 2: Usuario + SUBIR
 tk.Label(card, text="USUARIO:", font=lbl_font, bg=WHITE).grid(row=2, column=0, sticky="e", padx=12, pady=10)
 tk.Label(card, text="sa", bg=WHITE, fg=GRAY, font=("Arial", 12, "bold")).grid(row=2, column=1, sticky="w", padx=10, pady=10)
 
+# quita repetidos por (Linea, Periodo_Participacion, Tipo_Comision) al leer
+var_duplicados = tk.BooleanVar(value=False)
+tk.Checkbutton(card, text="Quitar duplicados", variable=var_duplicados, bg=WHITE,
+               activebackground=WHITE, font=("Arial", 10)).grid(row=2, column=1, sticky="e", padx=10)
+
 btn_subir = tk.Button(card, text="SUBIR", command=procesar_archivo,
                       bg="#2ecc71", fg="white", font=("Arial", 11, "bold"),
                       width=14, relief="flat", cursor="hand2")
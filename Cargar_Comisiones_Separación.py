@@ -1,15 +1,33 @@
 import os
 import re
+import time
+import mmap
+import multiprocessing
 import numpy as np
 import pandas as pd
 import pyodbc
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 
 # Para leer XLSB
 from pyxlsb import open_workbook
 
+# Sanitizadores, filtro de duplicados y periodo semanal compartidos (comisiones_comun.py, mismo directorio)
+from comisiones_comun import to_num_or_none, to_str_or_none, FiltroDuplicados, fila_sin_duplicar, periodo_semana, LLAVES_DUPLICADOS
+
+# Helpers SQL compartidos por los tres cargadores (comisiones_sql.py, mismo directorio)
+from comisiones_sql import (
+    obtener_conexion, devolver_conexion, estimar_ancho_fila, LoteAdaptativo, columnas_parametros,
+    parametros_lote, guardar_checkpoint, borrar_checkpoint, tabla_resumen,
+    preparar_resumen, acumular_resumen,
+)
+
+# Respaldo e interfaz compartidos (comisiones_respaldo.py / comisiones_ui.py, mismo directorio)
+from comisiones_respaldo import RESPALDO_OPCIONES, iniciar_respaldo, esperar_respaldo
+from comisiones_ui import bloquear_controles, reflejar_en_espejo, preguntar_reanudar
+
 # Para logo (Pillow)
 from PIL import Image, ImageTk
 
@@ -64,31 +82,6 @@ def limpiar_fecha_sql_datetime(x):
     except:
         return None
 
-def to_num_or_none(x):
-    try:
-        if x is None or pd.isna(x):
-            return None
-    except:
-        pass
-    try:
-        v = pd.to_numeric(x, errors="coerce")
-        if pd.isna(v) or v in (np.inf, -np.inf):
-            return None
-        return float(v)
-    except:
-        return None
-
-def to_str_or_none(x):
-    try:
-        if x is None or pd.isna(x):
-            return None
-    except:
-        pass
-    s = str(x).strip()
-    if s == "" or s.lower() in ("nan", "none"):
-        return None
-    return s
-
 
 # =========================
 # Columna Archivo desde nombre (con AJUSTE al final)
@@ -127,103 +120,217 @@ def formatear_archivo_desde_nombre(ruta, tipo_archivo):
     return f"{mes_completo} {anio} SEM {int(semana):02d} - {tipo_formateado}"
 
 
+# =========================
+# Esquema de dbo.Datos_Comisiones_* (también lo usa provisionar_tablas.py para el DDL)
+# =========================
+TABLAS_COMISIONES = {
+    "INICIALES": "dbo.Datos_Comisiones_Iniciales",
+    "PERMANENCIA": "dbo.Datos_Comisiones_Permanencia",
+    "PERMANENCIA 2": "dbo.Datos_Comisiones_Permanencia",
+    "RECARGAS": "dbo.Datos_Comisiones_Recargas"
+}
+
+COLUMNAS_SQL = {
+    "Linea": "BIGINT",
+    "Fecha_Portacion": "DATETIME",
+    "Estatus_Comision": "NVARCHAR(255)",
+    "Motivo_Rechazo": "NVARCHAR(255)",
+    "Tipo_Comision": "NVARCHAR(255)",
+    "Monto": "DECIMAL(18, 2)",
+    "Fuerza_Venta": "NVARCHAR(255)",
+    "Periodo_Participacion": "INT",
+    "Region_Registro": "INT",
+    "Num_Promotor": "BIGINT",
+    "Promotor": "NVARCHAR(255)",
+    "Num_Supervisor": "BIGINT",
+    "Nombre_Supervisor": "NVARCHAR(255)",
+    "Grupo": "NVARCHAR(255)",
+    "Num_Coord": "BIGINT",
+    "Nombre_Coord": "NVARCHAR(255)",
+    "Archivo": "NVARCHAR(255)"
+}
+
+# Llave de partición semanal (periodo_semana en comisiones_comun.py).
+# Solo existe en tablas provisionadas; la expresión SQL equivalente está en provisionar_tablas.py.
+COLUMNA_PERIODO = "Periodo_Semana"
+
+
 # =========================
 # TXT -> DataFrame (formato final 17 columnas)
 # - INICIALES/PERMANENCIA: layout clásico (>=23)
 # - RECARGAS/AJUSTE RECARGAS: layout largo (>=28/29) -> mapeo especial
+# - archivos grandes: se mapean en memoria (mmap) y se cortan en rangos de bytes que terminan en salto
+#   de línea; cada rango lo lee un proceso y los pedazos se juntan en el orden del archivo
 # =========================
-def txt_a_dataframe(ruta_txt, tipo_archivo):
-    archivo_formateado = formatear_archivo_desde_nombre(ruta_txt, tipo_archivo)
+TXT_PARALELO_MIN_MB = 64   # debajo de esto no compensa levantar procesos
+TXT_RANGO_MB = 32          # tamaño aprox. de cada rango (varios por proceso: se reparte mejor la carga)
+TXT_BLOQUE_MB = 8          # dentro de un rango se decodifica por bloques, no todo a la vez
+SALTOS_LINEA = re.compile(r"\r\n|\r|\n")   # los mismos cortes que open() en modo texto
+
+def txt_fila(line, t, archivo_formateado, filtro):
+    """Una línea del TXT -> dict de 17 columnas; None si no es registro válido o es duplicado."""
+    line = line.strip()
+    if not line:
+        return None
+
+    parts = [p.strip() for p in line.split("/")]
+
+    # Fix: token duplicado donde se repite la Linea (caso visto)
+    if len(parts) > 10 and parts[0].isdigit() and parts[9].isdigit() and parts[0] == parts[9]:
+        parts.pop(9)
+
+    # ---- MAPEOS ----
+    # ✅ RECARGAS (incluye AJUSTE RECARGAS) -> layout largo
+    if t == "RECARGAS" and len(parts) >= 28:
+        # Basado en tu orden real:
+        # 0 linea
+        # 1 fecha_portacion
+        # 3 estatus
+        # 4 motivo
+        # 5 tipo_comision
+        # 6 monto
+        # 7 fuerza_venta
+        # 10 periodo_participacion
+        # 14 region_registro
+        # 15 numPromotor
+        # 16 promotor
+        # 17 supervisor (nombre)
+        # 18 grupo
+        # 19 nombreCoo
+        # 20 numEmpCoo
+        # Nota: en estos recargas TXT normalmente NO viene num_supervisor numérico; lo dejamos NULL.
+        linea = to_num_or_none(parts[0])
+        if linea is None:
+            return None
+        llave = (linea, to_num_or_none(parts[10]), to_str_or_none(parts[5]))
+        if not filtro.es_nuevo(llave):
+            return None
+
+        return {
+            "Linea": linea,
+            "Fecha_Portacion": limpiar_fecha_sql_datetime(parts[1]),
+            "Estatus_Comision": to_str_or_none(parts[3]),
+            "Motivo_Rechazo": to_str_or_none(parts[4]),
+            "Tipo_Comision": llave[2],
+            "Monto": to_num_or_none(parts[6]),
+            "Fuerza_Venta": to_str_or_none(parts[7]),
+            "Periodo_Participacion": llave[1],
+            "Region_Registro": to_num_or_none(parts[14]),
+            "Num_Promotor": to_num_or_none(parts[15]),
+            "Promotor": to_str_or_none(parts[16]),
+            "Num_Supervisor": None,
+            "Nombre_Supervisor": to_str_or_none(parts[17]),
+            "Grupo": to_str_or_none(parts[18]),
+            "Num_Coord": to_num_or_none(parts[20]),
+            "Nombre_Coord": to_str_or_none(parts[19]),
+            "Archivo": archivo_formateado
+        }
+
+    # ✅ Layout clásico (INICIALES / PERMANENCIA / PERMANENCIA 2)
+    if len(parts) < 23:
+        return None
+
+    linea = to_num_or_none(parts[0])
+    if linea is None:
+        return None
+    llave = (linea, to_num_or_none(parts[10]), to_str_or_none(parts[5]))
+    if not filtro.es_nuevo(llave):
+        return None
+
+    return {
+        "Linea": linea,
+        "Fecha_Portacion": limpiar_fecha_sql_datetime(parts[1]),
+        "Estatus_Comision": to_str_or_none(parts[3]),
+        "Motivo_Rechazo": to_str_or_none(parts[4]),
+        "Tipo_Comision": llave[2],
+        "Monto": to_num_or_none(parts[6]),
+        "Fuerza_Venta": to_str_or_none(parts[7]),
+        "Periodo_Participacion": llave[1],
+        "Region_Registro": to_num_or_none(parts[13]),
+        "Num_Promotor": to_num_or_none(parts[14]),
+        "Promotor": to_str_or_none(parts[15]),
+        "Num_Supervisor": to_num_or_none(parts[22]),
+        "Nombre_Supervisor": to_str_or_none(parts[16]),
+        "Grupo": to_str_or_none(parts[17]),
+        "Num_Coord": to_num_or_none(parts[19]),
+        "Nombre_Coord": to_str_or_none(parts[18]),
+        "Archivo": archivo_formateado
+    }
+
+def txt_rangos(ruta_txt, partes):
+    """[(inicio, fin)] que cubren todo el archivo; cada corte cae justo después de un salto de línea."""
+    size = os.path.getsize(ruta_txt)
+    if size == 0:
+        return []
+    paso = max(1, size // partes)
+    cortes = [0]
+    with open(ruta_txt, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        while cortes[-1] < size:
+            salto = mm.find(b"\n", cortes[-1] + paso - 1)
+            cortes.append(size if salto < 0 else salto + 1)
+    return list(zip(cortes[:-1], cortes[1:]))
+
+def txt_leer_rango(ruta_txt, inicio, fin, tipo_archivo, archivo_formateado, quitar_duplicados=False):
+    """Lee los bytes [inicio, fin) del TXT -> (DataFrame del rango, duplicados descartados dentro del rango)."""
+    t = tipo_archivo.strip().upper()
+    filtro = FiltroDuplicados(quitar_duplicados)
+    bloque = max(1, int(TXT_BLOQUE_MB * 1024 * 1024))
 
     rows = []
-    with open(ruta_txt, encoding="latin1", errors="replace") as f:
-        for raw in f:
-            line = raw.strip()
-            if not line:
-                continue
-
-            parts = [p.strip() for p in line.split("/")]
-
-            # Fix: token duplicado donde se repite la Linea (caso visto)
-            if len(parts) > 10 and parts[0].isdigit() and parts[9].isdigit() and parts[0] == parts[9]:
-                parts.pop(9)
-
-            # ---- MAPEOS ----
-            t = tipo_archivo.strip().upper()
-
-            # ✅ RECARGAS (incluye AJUSTE RECARGAS) -> layout largo
-            if t == "RECARGAS" and len(parts) >= 28:
-                # Basado en tu orden real:
-                # 0 linea
-                # 1 fecha_portacion
-                # 3 estatus
-                # 4 motivo
-                # 5 tipo_comision
-                # 6 monto
-                # 7 fuerza_venta
-                # 10 periodo_participacion
-                # 14 region_registro
-                # 15 numPromotor
-                # 16 promotor
-                # 17 supervisor (nombre)
-                # 18 grupo
-                # 19 nombreCoo
-                # 20 numEmpCoo
-                # Nota: en estos recargas TXT normalmente NO viene num_supervisor numérico; lo dejamos NULL.
-                linea = to_num_or_none(parts[0])
-                if linea is None:
-                    continue
+    if fin > inicio:
+        with open(ruta_txt, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = inicio
+            while pos < fin:
+                salto = mm.find(b"\n", min(pos + bloque, fin) - 1, fin)
+                corte = fin if salto < 0 else salto + 1
+                for raw in SALTOS_LINEA.split(mm[pos:corte].decode("latin1")):
+                    fila = txt_fila(raw, t, archivo_formateado, filtro)
+                    if fila is not None:
+                        rows.append(fila)
+                pos = corte
+
+    df = filtro.terminar(pd.DataFrame(rows))
+    return df, filtro.descartados
+
+def txt_juntar(pedazos, quitar_duplicados=False):
+    """Concatena los rangos en orden; deja los tipos y los duplicados como si fuera una sola lectura."""
+    descartados = sum(n for _, n in pedazos)
+    llenos = [df for df, _ in pedazos if not df.empty]
+    if not llenos:
+        df = pd.DataFrame()
+    elif len(llenos) == 1:
+        df = llenos[0]
+    else:
+        df = pd.concat(llenos, ignore_index=True)
+        # un rango sin fechas (o sin supervisor) trae la columna como object: se vuelve a inferir completa
+        mezcladas = [c for c in df.columns if len({str(p[c].dtype) for p in llenos}) > 1]
+        if mezcladas:
+            df[mezcladas] = df[mezcladas].infer_objects()
+        if quitar_duplicados:
+            # duplicados entre rangos: se queda la primera aparición (los rangos van en orden)
+            antes = len(df)
+            df = df.drop_duplicates(subset=LLAVES_DUPLICADOS, keep="first").reset_index(drop=True)
+            descartados += antes - len(df)
+    df.attrs["duplicados"] = descartados
+    return df
+
+def txt_a_dataframe(ruta_txt, tipo_archivo, quitar_duplicados=False, procesos=None):
+    archivo_formateado = formatear_archivo_desde_nombre(ruta_txt, tipo_archivo)
+    procesos = procesos or os.cpu_count() or 1
+    size = os.path.getsize(ruta_txt)
 
-                rows.append({
-                    "Linea": linea,
-                    "Fecha_Portacion": limpiar_fecha_sql_datetime(parts[1]),
-                    "Estatus_Comision": to_str_or_none(parts[3]),
-                    "Motivo_Rechazo": to_str_or_none(parts[4]),
-                    "Tipo_Comision": to_str_or_none(parts[5]),
-                    "Monto": to_num_or_none(parts[6]),
-                    "Fuerza_Venta": to_str_or_none(parts[7]),
-                    "Periodo_Participacion": to_num_or_none(parts[10]),
-                    "Region_Registro": to_num_or_none(parts[14]),
-                    "Num_Promotor": to_num_or_none(parts[15]),
-                    "Promotor": to_str_or_none(parts[16]),
-                    "Num_Supervisor": None,
-                    "Nombre_Supervisor": to_str_or_none(parts[17]),
-                    "Grupo": to_str_or_none(parts[18]),
-                    "Num_Coord": to_num_or_none(parts[20]),
-                    "Nombre_Coord": to_str_or_none(parts[19]),
-                    "Archivo": archivo_formateado
-                })
-                continue
-
-            # ✅ Layout clásico (INICIALES / PERMANENCIA / PERMANENCIA 2)
-            if len(parts) < 23:
-                continue
-
-            linea = to_num_or_none(parts[0])
-            if linea is None:
-                continue
-
-            rows.append({
-                "Linea": linea,
-                "Fecha_Portacion": limpiar_fecha_sql_datetime(parts[1]),
-                "Estatus_Comision": to_str_or_none(parts[3]),
-                "Motivo_Rechazo": to_str_or_none(parts[4]),
-                "Tipo_Comision": to_str_or_none(parts[5]),
-                "Monto": to_num_or_none(parts[6]),
-                "Fuerza_Venta": to_str_or_none(parts[7]),
-                "Periodo_Participacion": to_num_or_none(parts[10]),
-                "Region_Registro": to_num_or_none(parts[13]),
-                "Num_Promotor": to_num_or_none(parts[14]),
-                "Promotor": to_str_or_none(parts[15]),
-                "Num_Supervisor": to_num_or_none(parts[22]),
-                "Nombre_Supervisor": to_str_or_none(parts[16]),
-                "Grupo": to_str_or_none(parts[17]),
-                "Num_Coord": to_num_or_none(parts[19]),
-                "Nombre_Coord": to_str_or_none(parts[18]),
-                "Archivo": archivo_formateado
-            })
-
-    return pd.DataFrame(rows)
+    if procesos <= 1 or size < TXT_PARALELO_MIN_MB * 1024 * 1024:
+        df, _ = txt_leer_rango(ruta_txt, 0, size, tipo_archivo, archivo_formateado, quitar_duplicados)
+        return df
+
+    rangos = txt_rangos(ruta_txt, max(procesos, -(-size // (TXT_RANGO_MB * 1024 * 1024))))
+    n = len(rangos)
+    with ProcessPoolExecutor(max_workers=min(procesos, n)) as pool:
+        pedazos = list(pool.map(
+            txt_leer_rango, [ruta_txt] * n, [r[0] for r in rangos], [r[1] for r in rangos],
+            [tipo_archivo] * n, [archivo_formateado] * n, [quitar_duplicados] * n,
+        ))
+    return txt_juntar(pedazos, quitar_duplicados)
 
 
 # =========================
@@ -232,8 +339,9 @@ def txt_a_dataframe(ruta_txt, tipo_archivo):
 # - Si NO trae encabezados: asume tu ORDEN de 28 columnas
 # - IMPORTANTE: Archivo SIEMPRE se fuerza al nombre formateado (nunca viene NULL)
 # =========================
-def xlsb_a_dataframe(ruta_xlsb, tipo_archivo):
+def xlsb_a_dataframe(ruta_xlsb, tipo_archivo, quitar_duplicados=False):
     archivo_formateado = formatear_archivo_desde_nombre(ruta_xlsb, tipo_archivo)
+    filtro = FiltroDuplicados(quitar_duplicados)
 
     assumed_headers = [
         "linea", "fecha_portacion", "fecha_primer_ingreso", "estatus_comision",
@@ -266,25 +374,26 @@ def xlsb_a_dataframe(ruta_xlsb, tipo_archivo):
             parece_header = ("linea" in first_set and "monto" in first_set)
 
             rows_all = []
-            if parece_header:
-                headers_norm = first_vals
-                for row in it:
-                    rows_all.append([c.v for c in row])
-            else:
-                headers_norm = assumed_headers
+            headers_norm = first_vals if parece_header else assumed_headers
+            es_nueva = fila_sin_duplicar(filtro, headers_norm)
+            if not parece_header:
                 rows_all.append([c.v for c in first_row])  # primera fila es dato
-                for row in it:
-                    rows_all.append([c.v for c in row])
+                if not es_nueva(rows_all[0]):
+                    rows_all.pop()
+            for row in it:
+                vals = [c.v for c in row]
+                if es_nueva(vals):
+                    rows_all.append(vals)
 
     if not rows_all:
-        return pd.DataFrame()
+        return filtro.terminar(pd.DataFrame())
 
     max_cols = max(len(r) for r in rows_all)
     fixed_rows = [r + [None] * (max_cols - len(r)) for r in rows_all]
 
     if headers_norm == assumed_headers:
         if max_cols < len(assumed_headers):
-            return pd.DataFrame()
+            return filtro.terminar(pd.DataFrame())
         fixed_rows = [r[:len(assumed_headers)] for r in fixed_rows]
         df_raw = pd.DataFrame(fixed_rows, columns=assumed_headers)
     else:
@@ -316,53 +425,14 @@ def xlsb_a_dataframe(ruta_xlsb, tipo_archivo):
     })
 
     df = df[df["Linea"].notna()].copy()
-    return df
-
-
-# =========================
-# Excel rápido con XlsxWriter
-# =========================
-def guardar_excel_rapido(df, ruta_excel):
-    with pd.ExcelWriter(ruta_excel, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name="Datos")
-
-        wb = writer.book
-        ws = writer.sheets["Datos"]
-
-        header_fmt = wb.add_format({
-            "bold": True,
-            "font_name": "Arial",
-            "font_size": 12,
-            "align": "center",
-            "valign": "vcenter",
-            "text_wrap": True,
-            "border": 1
-        })
-
-        body_fmt = wb.add_format({
-            "font_name": "Arial",
-            "font_size": 12,
-            "valign": "vcenter"
-        })
-
-        for col, name in enumerate(df.columns):
-            ws.write(0, col, name, header_fmt)
-
-        ws.set_column(0, len(df.columns) - 1, 22, body_fmt)
-        ws.freeze_panes(1, 0)
-        ws.autofilter(0, 0, len(df), len(df.columns) - 1)
+    return filtro.terminar(df)
 
 
 # =========================
 # Insertar SQL rápido
 # =========================
-def insertar_en_sql(df, tipo_archivo, password):
-    tabla_destino = {
-        "INICIALES": "dbo.Datos_Comisiones_Iniciales",
-        "PERMANENCIA": "dbo.Datos_Comisiones_Permanencia",
-        "PERMANENCIA 2": "dbo.Datos_Comisiones_Permanencia",
-        "RECARGAS": "dbo.Datos_Comisiones_Recargas"
-    }[tipo_archivo]
+def insertar_en_sql(df, tipo_archivo, password, ruta=None):
+    tabla_destino = TABLAS_COMISIONES[tipo_archivo]
 
     conn_str = (
         "DRIVER={ODBC Driver 17 for SQL Server};"
@@ -372,8 +442,10 @@ def insertar_en_sql(df, tipo_archivo, password):
         "TrustServerCertificate=Yes;"
     )
 
+    total = len(df)
+
     try:
-        conn = pyodbc.connect(conn_str, autocommit=False)
+        conn = obtener_conexion(conn_str)
     except pyodbc.Error as e:
         if "Login failed for user" in str(e):
             messagebox.showerror("CONTRASEÑA INCORRECTA", "❌ La contraseña ingresada es incorrecta para el usuario 'sa'.")
@@ -383,79 +455,233 @@ def insertar_en_sql(df, tipo_archivo, password):
 
     cursor = conn.cursor()
     cursor.fast_executemany = True
+    # el checkpoint vive en SQL: se consulta con la conexión ya abierta
+    clave, inicio = preguntar_reanudar(cursor, ruta, tabla_destino, total)
 
-    columnas_sql = [
-        "Linea","Fecha_Portacion","Estatus_Comision","Motivo_Rechazo","Tipo_Comision",
-        "Monto","Fuerza_Venta","Periodo_Participacion","Region_Registro","Num_Promotor",
-        "Promotor","Num_Supervisor","Nombre_Supervisor","Grupo","Num_Coord","Nombre_Coord","Archivo"
-    ]
+    columnas_sql = list(COLUMNAS_SQL)
+
+    # tablas particionadas por provisionar_tablas.py: la llave semanal la calcula el cargador
+    cursor.execute("SELECT COL_LENGTH(?, ?)", tabla_destino, COLUMNA_PERIODO)
+    if cursor.fetchone()[0] is not None:
+        df = df.assign(**{COLUMNA_PERIODO: df["Archivo"].map(periodo_semana)})
+        columnas_sql.append(COLUMNA_PERIODO)
 
     df = df[columnas_sql].copy()
     df = df.replace([np.inf, -np.inf], np.nan)
     df = df.where(pd.notnull(df), None)
 
-    data = df.to_numpy(dtype=object)
-    data[(data != data)] = None
-    values = list(map(tuple, data))
+    columnas = columnas_parametros(df)
 
-    total = len(values)
     progress_bar["maximum"] = max(total, 1)
-    progress_bar["value"] = 0
+    progress_bar["value"] = inicio
 
     placeholders = ",".join(["?"] * len(columnas_sql))
     cols = ",".join(columnas_sql)
     sql = f"INSERT INTO {tabla_destino} ({cols}) VALUES ({placeholders})"
 
-    CHUNK = 5000
+    lote = LoteAdaptativo(estimar_ancho_fila(columnas))
+    start = inicio
+    tabla_res = tabla_resumen(tabla_destino)
 
     try:
-        for start in range(0, total, CHUNK):
+        preparar_resumen(cursor, tabla_res)
+
+        while start < total:
             if cancelar:
-                label_progreso.config(text="🚫 Carga cancelada por el usuario.", fg="#c0392b")
-                conn.rollback()
-                conn.close()
+                label_progreso.config(text=f"🚫 Carga cancelada por el usuario ({start} de {total} cargados; se puede reanudar).", fg="#c0392b")
+                devolver_conexion(conn_str, conn)
                 return False
 
-            end = min(start + CHUNK, total)
-            cursor.executemany(sql, values[start:end])
+            end = min(start + lote.tamano, total)
+            t0 = time.perf_counter()
+            cursor.executemany(sql, parametros_lote(columnas, start, end))
+            acumular_resumen(cursor, tabla_res, df.iloc[start:end])
+            if clave:
+                # mismo commit que el lote: filas y avance se confirman juntos
+                guardar_checkpoint(cursor, clave, {"tabla": tabla_destino, "total": total, "filas_confirmadas": end})
             conn.commit()
+            lote.registrar(end - start, time.perf_counter() - t0)
+            start = end
 
             progress_bar["value"] = end
-            label_progreso.config(text=f"Insertando registro {end} de {total}...")
+            label_progreso.config(text=f"Insertando registro {end} de {total}... (lote de {lote.tamano:,} filas)")
             ventana.update_idletasks()
 
+        if clave:
+            borrar_checkpoint(cursor, clave)
+            conn.commit()
+
     except Exception as e:
-        conn.rollback()
-        conn.close()
+        devolver_conexion(conn_str, conn, rota=True)
         raise e
 
-    conn.close()
+    devolver_conexion(conn_str, conn)
+    reflejar_en_espejo(df, tabla_destino, label_progreso, ventana)
     return True
 
 
 # =========================
 # Procesamiento por extensión
 # =========================
-def construir_df_desde_archivo(ruta, tipo_archivo):
+def construir_df_desde_archivo(ruta, tipo_archivo, quitar_duplicados=False, procesos=None):
     ext = os.path.splitext(ruta)[1].lower()
     if ext == ".txt":
-        return txt_a_dataframe(ruta, tipo_archivo)
+        return txt_a_dataframe(ruta, tipo_archivo, quitar_duplicados, procesos)
     if ext == ".xlsb":
-        return xlsb_a_dataframe(ruta, tipo_archivo)
+        return xlsb_a_dataframe(ruta, tipo_archivo, quitar_duplicados)
     raise ValueError("Solo se aceptan archivos .txt o .xlsb")
 
+def inferir_tipo_archivo(ruta):
+    # "SEM 05 ENE 2025 - AJUSTE PERMANENCIA 2.txt" -> "PERMANENCIA 2" (AJUSTE lo marca formatear_archivo_desde_nombre)
+    nombre = re.sub(r"[^A-Z0-9]+", " ", os.path.splitext(os.path.basename(ruta))[0].upper())
+    if "RECARGA" in nombre:
+        return "RECARGAS"
+    if re.search(r"\bPERM(ANENCIA)?\s*2\b", nombre):
+        return "PERMANENCIA 2"
+    if "PERMANENCIA" in nombre:
+        return "PERMANENCIA"
+    if "INICIAL" in nombre:
+        return "INICIALES"
+    return None
+
 
 # =========================
 # GUI acciones
 # =========================
+archivos_seleccionados = []
+
+def texto_cola(n):
+    return f"{n} archivos seleccionados (cola)"
+
+def mostrar_cola(rutas, tipos):
+    tabla_cola.delete(*tabla_cola.get_children())
+    for i, ruta in enumerate(rutas):
+        tabla_cola.insert("", "end", iid=str(i), values=(os.path.basename(ruta), tipos.get(ruta) or "?", "En cola", ""))
+
+def marcar_cola(i, estado, registros=None):
+    tabla_cola.set(str(i), "estado", estado)
+    if registros is not None:
+        tabla_cola.set(str(i), "registros", f"{registros:,}")
+    tabla_cola.see(str(i))
+    ventana.update_idletasks()
+
 def seleccionar_archivo():
-    ruta = filedialog.askopenfilename(filetypes=[
+    rutas = filedialog.askopenfilenames(filetypes=[
         ("Archivos TXT o XLSB", "*.txt *.xlsb"),
         ("TXT", "*.txt"),
         ("XLSB", "*.xlsb"),
     ])
+    if not rutas:
+        return
+    archivos_seleccionados[:] = list(rutas)
     entry_ruta.delete(0, tk.END)
-    entry_ruta.insert(0, ruta)
+    entry_ruta.insert(0, rutas[0] if len(rutas) == 1 else texto_cola(len(rutas)))
+    if len(rutas) == 1 and not combo_tipo.get() and inferir_tipo_archivo(rutas[0]):
+        combo_tipo.set(inferir_tipo_archivo(rutas[0]))
+    mostrar_cola(rutas, {r: inferir_tipo_archivo(r) or combo_tipo.get() for r in rutas})
+
+def procesar_cola(rutas, pwd):
+    """Lee todos los archivos en paralelo (procesos) y los sube uno por uno conforme quedan listos."""
+    global cancelar
+
+    tipos = {r: inferir_tipo_archivo(r) or combo_tipo.get() for r in rutas}
+    sin_tipo = [os.path.basename(r) for r in rutas if not tipos[r]]
+    if sin_tipo:
+        messagebox.showerror("Error", "No pude deducir el tipo de:\n" + "\n".join(sin_tipo)
+                             + "\n\nElige un tipo de archivo para usarlo en esos casos.")
+        return
+
+    mostrar_cola(rutas, tipos)
+    opcion_respaldo = combo_respaldo.get()
+    quitar_duplicados = var_duplicados.get()
+    resumen = {}  # índice -> (ok, registros, detalle)
+    duplicados = {}  # índice -> filas repetidas descartadas al leer
+    detener = False
+
+    bloquear_controles(True, btn_subir, btn_buscar)
+    try:
+        lectores = min(len(rutas), os.cpu_count() or 2)
+        # cada archivo grande reparte sus rangos entre los núcleos que le tocan (sin saturar el equipo)
+        procesos = max(1, (os.cpu_count() or 2) // lectores)
+        with ProcessPoolExecutor(max_workers=lectores) as pool:
+            futuros = {pool.submit(construir_df_desde_archivo, r, tipos[r], quitar_duplicados, procesos): i
+                       for i, r in enumerate(rutas)}
+            for i in range(len(rutas)):
+                marcar_cola(i, "Leyendo...")
+            pendientes = set(futuros)
+
+            while pendientes and not detener:
+                listos = [f for f in pendientes if f.done()]
+                if not listos:
+                    label_progreso.config(text=f"Leyendo archivos en paralelo... ({len(pendientes)} pendientes)", fg="#1f4e79")
+                    ventana.update()
+                    detener = cancelar
+                    time.sleep(0.05)
+                    continue
+
+                fut = listos[0]
+                pendientes.discard(fut)
+                i = futuros[fut]
+                ruta = rutas[i]
+                try:
+                    df = fut.result()
+                except Exception as e:
+                    marcar_cola(i, "❌ Error al leer")
+                    resumen[i] = (False, 0, str(e))
+                    continue
+                duplicados[i] = df.attrs.get("duplicados", 0)
+                if df.empty:
+                    marcar_cola(i, "❌ Sin registros válidos", 0)
+                    resumen[i] = (False, 0, "sin registros válidos")
+                    continue
+
+                marcar_cola(i, "Subiendo...", len(df))
+                label_progreso.config(text=f"Cargando a SQL Server: {os.path.basename(ruta)}", fg="#1f4e79")
+                respaldo = iniciar_respaldo(df, ruta, opcion_respaldo)
+                try:
+                    ok = insertar_en_sql(df, tipos[ruta], pwd, ruta=ruta)
+                    error = None
+                except Exception as e:
+                    ok, error = False, str(e)
+                esperar_respaldo(respaldo, ventana)
+
+                if ok:
+                    marcar_cola(i, "✅ Cargado")
+                    resumen[i] = (True, len(df), respaldo["ruta"] or "")
+                elif error:
+                    marcar_cola(i, "❌ Error al cargar")
+                    resumen[i] = (False, 0, error)
+                else:
+                    # cancelación o contraseña/conexión: no tiene caso seguir con la cola
+                    marcar_cola(i, "🚫 Detenido")
+                    resumen[i] = (False, 0, "detenido")
+                    detener = True
+
+            if pendientes:
+                pool.shutdown(wait=False, cancel_futures=True)
+                for fut in pendientes:
+                    marcar_cola(futuros[fut], "⏸ No cargado")
+                    resumen[futuros[fut]] = (False, 0, "no cargado")
+    finally:
+        bloquear_controles(False, btn_subir, btn_buscar)
+        cancelar = False
+
+    cargados = [i for i, (ok, _, _) in resumen.items() if ok]
+    total_registros = sum(resumen[i][1] for i in cargados)
+    total_duplicados = sum(duplicados.get(i, 0) for i in cargados)
+    lineas = []
+    for i, ruta in enumerate(rutas):
+        ok, n, detalle = resumen.get(i, (False, 0, "no procesado"))
+        dup = f", {duplicados[i]:,} duplicados descartados" if duplicados.get(i) else ""
+        lineas.append(f"{'✅' if ok else '❌'} {os.path.basename(ruta)} ({tipos[ruta]}): "
+                      + (f"{n:,} registros{dup}" if ok else detalle))
+    label_progreso.config(text=f"Cola terminada: {len(cargados)} de {len(rutas)} archivos cargados.",
+                          fg="#1e7e34" if len(cargados) == len(rutas) else "#c0392b")
+    messagebox.showinfo("Resumen de la cola",
+                        f"Archivos cargados: {len(cargados)} de {len(rutas)}\n"
+                        f"Registros cargados: {total_registros:,}\n"
+                        + (f"Duplicados descartados: {total_duplicados:,}\n" if quitar_duplicados else "")
+                        + "\n" + "\n".join(lineas))
 
 def procesar_archivo():
     global cancelar
@@ -465,144 +691,184 @@ def procesar_archivo():
     tipo = combo_tipo.get()
     pwd = entry_pwd.get()
 
+    if len(archivos_seleccionados) > 1 and ruta == texto_cola(len(archivos_seleccionados)):
+        if not pwd:
+            messagebox.showerror("Error", "Por favor completa todos los campos.")
+            return
+        procesar_cola(list(archivos_seleccionados), pwd)
+        return
+
     if not ruta or not tipo or not pwd:
         messagebox.showerror("Error", "Por favor completa todos los campos.")
         return
 
+    bloquear_controles(True, btn_subir, btn_buscar)
     try:
         label_progreso.config(text="Procesando archivo...", fg="#1f4e79")
         ventana.update_idletasks()
 
-        df = construir_df_desde_archivo(ruta, tipo)
+        df = construir_df_desde_archivo(ruta, tipo, var_duplicados.get())
+        duplicados = df.attrs.get("duplicados", 0)
         if df.empty:
             messagebox.showerror("Error", "El archivo no generó registros válidos.")
             return
 
-        ruta_excel = os.path.splitext(ruta)[0] + "_FORMATEADO.xlsx"
-        guardar_excel_rapido(df, ruta_excel)
+        # el respaldo se escribe en paralelo con la carga a SQL
+        respaldo = iniciar_respaldo(df, ruta, combo_respaldo.get())
 
         label_progreso.config(text="Cargando a SQL Server...", fg="#1f4e79")
         ventana.update_idletasks()
 
-        ok = insertar_en_sql(df, tipo, pwd)
+        ok = insertar_en_sql(df, tipo, pwd, ruta=ruta)
+
+        if respaldo["hilo"].is_alive():
+            label_progreso.config(text="Terminando respaldo...", fg="#1f4e79")
+        esperar_respaldo(respaldo, ventana)
+        if respaldo["error"]:
+            messagebox.showwarning("Respaldo", f"No se pudo generar el respaldo:\n{respaldo['error']}")
         if not ok:
             return
 
         label_progreso.config(text="✅ ¡Carga completada!", fg="#1e7e34")
-        messagebox.showinfo("Éxito", f"Excel generado:\n{ruta_excel}\n\nRegistros cargados: {len(df)}")
+        resp_txt = f"Respaldo generado:\n{respaldo['ruta']}" if respaldo["ruta"] else "Sin respaldo"
+        dup_txt = f"\nDuplicados descartados: {duplicados:,}" if var_duplicados.get() else ""
+        messagebox.showinfo("Éxito", f"{resp_txt}\n\nRegistros cargados: {len(df)}{dup_txt}")
 
     except Exception as e:
         messagebox.showerror("Error", str(e))
+    finally:
+        bloquear_controles(False, btn_subir, btn_buscar)
 
 
 # ============================================================
 #   GUI CORPORATIVA (SOLO DISEÑO) - SIN CAMBIAR FUNCIONAMIENTO
 # ============================================================
-ventana = tk.Tk()
-ventana.title("Cargar Comisiones - Grupo Comercial Ideal")
-ventana.geometry("960x560")
-ventana.resizable(False, False)
-
-BG = "#eef2f6"
-WHITE = "#ffffff"
-NAVY = "#0b2e4a"
-NAVY2 = "#123a5a"
-GRAY = "#6b7785"
-
-ventana.configure(bg=BG)
-
-# Header
-header = tk.Frame(ventana, bg=NAVY, height=75)
-header.pack(side="top", fill="x")
-header.pack_propagate(False)
-
-# Logo en header (en lugar del texto)
-header_logo_tk = None
-try:
-    logo_header_path = os.path.join(os.path.dirname(__file__), "logo_header.png")
-    if os.path.exists(logo_header_path):
-        img = Image.open(logo_header_path).convert("RGBA")
-        img = img.resize((280, 60))
-        header_logo_tk = ImageTk.PhotoImage(img)
-except:
+# el guard evita que los procesos de lectura (ProcessPoolExecutor) vuelvan a abrir la ventana
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+
+    ventana = tk.Tk()
+    ventana.title("Cargar Comisiones - Grupo Comercial Ideal")
+    ventana.geometry("960x760")
+    ventana.resizable(False, False)
+
+    BG = "#eef2f6"
+    WHITE = "#ffffff"
+    NAVY = "#0b2e4a"
+    NAVY2 = "#123a5a"
+    GRAY = "#6b7785"
+
+    ventana.configure(bg=BG)
+
+    # Header
+    header = tk.Frame(ventana, bg=NAVY, height=75)
+    header.pack(side="top", fill="x")
+    header.pack_propagate(False)
+
+    # Logo en header (en lugar del texto)
     header_logo_tk = None
+    try:
+        logo_header_path = os.path.join(os.path.dirname(__file__), "logo_header.png")
+        if os.path.exists(logo_header_path):
+            img = Image.open(logo_header_path).convert("RGBA")
+            img = img.resize((280, 60))
+            header_logo_tk = ImageTk.PhotoImage(img)
+    except:
+        header_logo_tk = None
 
-if header_logo_tk:
-    tk.Label(header, image=header_logo_tk, bg=NAVY).pack(side="left", padx=16)
-else:
-    tk.Label(header, text="GRUPO COMERCIAL IDEAL", bg=NAVY, fg="white",
-             font=("Arial", 14, "bold")).pack(side="left", padx=16)
-
-# Main
-main = tk.Frame(ventana, bg=BG)
-main.pack(fill="both", expand=True, padx=18, pady=18)
-
-tk.Label(main, text="CARGAR COMISIONES", bg=BG, fg=NAVY,
-         font=("Arial", 28, "bold")).pack(pady=(6, 18))
-
-# Card con borde estilo sombra
-shadow = tk.Frame(main, bg="#d6dde6")
-shadow.pack(pady=0)
-
-card = tk.Frame(shadow, bg=WHITE, padx=18, pady=18)
-card.pack(padx=2, pady=2)
-
-# Grid settings
-card.grid_columnconfigure(0, weight=0)
-card.grid_columnconfigure(1, weight=1)
-card.grid_columnconfigure(2, weight=0)
-
-lbl_font = ("Arial", 12, "bold")
-
-# Styles barra progreso
-style = ttk.Style()
-style.theme_use("clam")
-style.configure("green.Horizontal.TProgressbar",
-                background="#27ae60",
-                troughcolor="#d8d8d8",
-                thickness=18)
-
-# Row 0: Archivo
-tk.Label(card, text="Archivo TXT o XLSB:", font=lbl_font, bg=WHITE).grid(row=0, column=0, sticky="e", padx=12, pady=10)
-entry_ruta = tk.Entry(card, font=("Arial", 11))
-entry_ruta.grid(row=0, column=1, sticky="ew", padx=10, pady=10)
-
-btn_buscar = tk.Button(card, text="Buscar", command=seleccionar_archivo,
-                       bg=NAVY2, fg="white", font=("Arial", 10, "bold"),
-                       width=12, relief="flat", cursor="hand2")
-btn_buscar.grid(row=0, column=2, padx=10, pady=10, sticky="e")
-
-# Row 1: Tipo
-tk.Label(card, text="Tipo de archivo:", font=lbl_font, bg=WHITE).grid(row=1, column=0, sticky="e", padx=12, pady=10)
-combo_tipo = ttk.Combobox(card, values=["INICIALES", "PERMANENCIA", "PERMANENCIA 2", "RECARGAS"],
-                          state="readonly")
-combo_tipo.grid(row=1, column=1, sticky="ew", padx=10, pady=10)
-
-# Row 2: Usuario + SUBIR
-tk.Label(card, text="USUARIO:", font=lbl_font, bg=WHITE).grid(row=2, column=0, sticky="e", padx=12, pady=10)
-tk.Label(card, text="sa", bg=WHITE, fg=GRAY, font=("Arial", 12, "bold")).grid(row=2, column=1, sticky="w", padx=10, pady=10)
-
-btn_subir = tk.Button(card, text="SUBIR", command=procesar_archivo,
-                      bg="#2ecc71", fg="white", font=("Arial", 11, "bold"),
-                      width=14, relief="flat", cursor="hand2")
-btn_subir.grid(row=2, column=2, padx=10, pady=6, sticky="e")
-
-# Row 3: Contraseña + CANCELAR
-tk.Label(card, text="CONTRASEÑA:", font=lbl_font, bg=WHITE).grid(row=3, column=0, sticky="e", padx=12, pady=10)
-entry_pwd = tk.Entry(card, show="*", width=25, font=("Arial", 11))
-entry_pwd.grid(row=3, column=1, sticky="w", padx=10, pady=10)
-
-btn_cancelar = tk.Button(card, text="CANCELAR", command=cancelar_carga,
-                         bg="#e74c3c", fg="white", font=("Arial", 11, "bold"),
-                         width=14, relief="flat", cursor="hand2")
-btn_cancelar.grid(row=3, column=2, padx=10, pady=6, sticky="e")
-
-# Progress
-progress_bar = ttk.Progressbar(card, orient="horizontal", length=840, mode="determinate",
-                               style="green.Horizontal.TProgressbar")
-progress_bar.grid(row=4, column=0, columnspan=3, pady=(18, 8))
-
-label_progreso = tk.Label(card, text="", bg=WHITE, fg="#1f4e79", font=("Arial", 11, "bold"))
-label_progreso.grid(row=5, column=0, columnspan=3, pady=(2, 2))
-
-ventana.mainloop()
+    if header_logo_tk:
+        tk.Label(header, image=header_logo_tk, bg=NAVY).pack(side="left", padx=16)
+    else:
+        tk.Label(header, text="GRUPO COMERCIAL IDEAL", bg=NAVY, fg="white",
+                 font=("Arial", 14, "bold")).pack(side="left", padx=16)
+
+    # Main
+    main = tk.Frame(ventana, bg=BG)
+    main.pack(fill="both", expand=True, padx=18, pady=18)
+
+    tk.Label(main, text="CARGAR COMISIONES", bg=BG, fg=NAVY,
+             font=("Arial", 28, "bold")).pack(pady=(6, 18))
+
+    # Card con borde estilo sombra
+    shadow = tk.Frame(main, bg="#d6dde6")
+    shadow.pack(pady=0)
+
+    card = tk.Frame(shadow, bg=WHITE, padx=18, pady=18)
+    card.pack(padx=2, pady=2)
+
+    # Grid settings
+    card.grid_columnconfigure(0, weight=0)
+    card.grid_columnconfigure(1, weight=1)
+    card.grid_columnconfigure(2, weight=0)
+
+    lbl_font = ("Arial", 12, "bold")
+
+    # Styles barra progreso
+    style = ttk.Style()
+    style.theme_use("clam")
+    style.configure("green.Horizontal.TProgressbar",
+                    background="#27ae60",
+                    troughcolor="#d8d8d8",
+                    thickness=18)
+
+    # Row 0: Archivo
+    tk.Label(card, text="Archivo TXT o XLSB:", font=lbl_font, bg=WHITE).grid(row=0, column=0, sticky="e", padx=12, pady=10)
+    entry_ruta = tk.Entry(card, font=("Arial", 11))
+    entry_ruta.grid(row=0, column=1, sticky="ew", padx=10, pady=10)
+
+    btn_buscar = tk.Button(card, text="Buscar", command=seleccionar_archivo,
+                           bg=NAVY2, fg="white", font=("Arial", 10, "bold"),
+                           width=12, relief="flat", cursor="hand2")
+    btn_buscar.grid(row=0, column=2, padx=10, pady=10, sticky="e")
+
+    # Row 1: Tipo
+    tk.Label(card, text="Tipo de archivo:", font=lbl_font, bg=WHITE).grid(row=1, column=0, sticky="e", padx=12, pady=10)
+    combo_tipo = ttk.Combobox(card, values=["INICIALES", "PERMANENCIA", "PERMANENCIA 2", "RECARGAS"],
+                              state="readonly")
+    combo_tipo.grid(row=1, column=1, sticky="ew", padx=10, pady=10)
+
+    combo_respaldo = ttk.Combobox(card, values=RESPALDO_OPCIONES, state="readonly", width=16)
+    combo_respaldo.set(RESPALDO_OPCIONES[0])
+    combo_respaldo.grid(row=1, column=2, padx=10, pady=10, sticky="e")
+
+    # Row 2: Usuario + SUBIR
+    tk.Label(card, text="USUARIO:", font=lbl_font, bg=WHITE).grid(row=2, column=0, sticky="e", padx=12, pady=10)
+    tk.Label(card, text="sa", bg=WHITE, fg=GRAY, font=("Arial", 12, "bold")).grid(row=2, column=1, sticky="w", padx=10, pady=10)
+
+    # quita repetidos por (Linea, Periodo_Participacion, Tipo_Comision) al leer
+    var_duplicados = tk.BooleanVar(value=False)
+    tk.Checkbutton(card, text="Quitar duplicados", variable=var_duplicados, bg=WHITE,
+                   activebackground=WHITE, font=("Arial", 10)).grid(row=2, column=1, sticky="e", padx=10)
+
+    btn_subir = tk.Button(card, text="SUBIR", command=procesar_archivo,
+                          bg="#2ecc71", fg="white", font=("Arial", 11, "bold"),
+                          width=14, relief="flat", cursor="hand2")
+    btn_subir.grid(row=2, column=2, padx=10, pady=6, sticky="e")
+
+    # Row 3: Contraseña + CANCELAR
+    tk.Label(card, text="CONTRASEÑA:", font=lbl_font, bg=WHITE).grid(row=3, column=0, sticky="e", padx=12, pady=10)
+    entry_pwd = tk.Entry(card, show="*", width=25, font=("Arial", 11))
+    entry_pwd.grid(row=3, column=1, sticky="w", padx=10, pady=10)
+
+    btn_cancelar = tk.Button(card, text="CANCELAR", command=cancelar_carga,
+                             bg="#e74c3c", fg="white", font=("Arial", 11, "bold"),
+                             width=14, relief="flat", cursor="hand2")
+    btn_cancelar.grid(row=3, column=2, padx=10, pady=6, sticky="e")
+
+    # Progress
+    progress_bar = ttk.Progressbar(card, orient="horizontal", length=840, mode="determinate",
+                                   style="green.Horizontal.TProgressbar")
+    progress_bar.grid(row=4, column=0, columnspan=3, pady=(18, 8))
+
+    label_progreso = tk.Label(card, text="", bg=WHITE, fg="#1f4e79", font=("Arial", 11, "bold"))
+    label_progreso.grid(row=5, column=0, columnspan=3, pady=(2, 2))
+
+    # Cola de archivos (selección múltiple en "Buscar")
+    tabla_cola = ttk.Treeview(card, columns=("archivo", "tipo", "estado", "registros"), show="headings", height=6)
+    for col, titulo, ancho in [("archivo", "Archivo", 420), ("tipo", "Tipo", 130),
+                               ("estado", "Estado", 170), ("registros", "Registros", 100)]:
+        tabla_cola.heading(col, text=titulo)
+        tabla_cola.column(col, width=ancho, anchor="w" if col == "archivo" else "center")
+    tabla_cola.grid(row=6, column=0, columnspan=3, sticky="ew", pady=(10, 0))
+
+    ventana.mainloop()
@@ -4,21 +4,25 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import os
 import re
+import time
+
+# Helpers SQL compartidos por los tres cargadores (comisiones_sql.py, mismo directorio)
+from comisiones_sql import (
+    obtener_conexion, devolver_conexion, estimar_ancho_fila, LoteAdaptativo, columnas_parametros,
+    parametros_lote, guardar_checkpoint, borrar_checkpoint,
+)
+
+# Helpers de interfaz compartidos (comisiones_ui.py, mismo directorio)
+from comisiones_ui import bloquear_controles, reflejar_en_espejo, preguntar_reanudar
 
 # =========================
 # Validación de fechas válidas para SQL Server
 # =========================
-def limpiar_fecha(fecha):
-    if pd.isnull(fecha):
-        return None
-    try:
-        fecha = pd.to_datetime(fecha, errors="coerce")
-        if pd.isnull(fecha): return None
-        if fecha.year < 1753 or fecha.year > 9999:
-            return None
-        return fecha.date()
-    except:
-        return None
+def limpiar_fechas(serie):
+    # vectorizado: inválidas o fuera del rango de SQL Server (1753-9999) -> None, válidas -> date
+    fechas = pd.to_datetime(serie, errors="coerce")
+    fechas = fechas.where((fechas.dt.year >= 1753) & (fechas.dt.year <= 9999))
+    return fechas.dt.date.astype(object).where(fechas.notna(), None)
 
 cancelar = False
 
@@ -56,12 +60,12 @@ def transformar_archivo(ruta_archivo, tipo_archivo):
 
     df = pd.DataFrame()
     df["linea"] = df_raw.iloc[1:, 2].astype(str).str.strip()
-    df["fecha_portacion"] = pd.to_datetime(df_raw.iloc[1:, 4], errors="coerce").apply(limpiar_fecha)
-    df["fecha_primer_ingreso"] = pd.to_datetime(df_raw.iloc[1:, 5], errors="coerce").apply(limpiar_fecha)
+    df["fecha_portacion"] = limpiar_fechas(df_raw.iloc[1:, 4])
+    df["fecha_primer_ingreso"] = limpiar_fechas(df_raw.iloc[1:, 5])
     df["estatus_comision"] = df_raw.iloc[1:, 7].astype(str).str.strip()
     df["motivo_rechazo"] = df_raw.iloc[1:, 8].astype(str).str.strip()
     df["tipo_comision"] = df_raw.iloc[1:, 9].astype(str).str.strip()
-    df["monto"] = pd.to_numeric(df_raw.iloc[1:, 10], errors="coerce").apply(lambda x: float(x) if pd.notnull(x) else None)
+    df["monto"] = pd.to_numeric(df_raw.iloc[1:, 10], errors="coerce").astype(float)
     df["fuerza_venta"] = df_raw.iloc[1:, 1].astype(str).str.strip()
     df["carrier"] = df_raw.iloc[1:, 3].astype(str).str.strip()
     df["archivo"] = formatear_nombre_archivo(ruta_archivo, tipo_archivo)
@@ -74,7 +78,7 @@ def transformar_archivo(ruta_archivo, tipo_archivo):
 # =========================
 # Cargar a SQL Server
 # =========================
-def insertar_en_sql(df, tipo_archivo, password):
+def insertar_en_sql(df, tipo_archivo, password, ruta=None):
     tabla_destino = {
         "INICIALES": "dbo.tComisionesIniciales",
         "PERMANENCIA": "dbo.tComisionesPermanencia",
@@ -90,8 +94,10 @@ def insertar_en_sql(df, tipo_archivo, password):
         f"PWD={password}"
     )
 
+    total = len(df)
+
     try:
-        conn = pyodbc.connect(conn_str)
+        conn = obtener_conexion(conn_str)
     except pyodbc.Error as e:
         if "Login failed for user" in str(e):
             messagebox.showerror("CONTRASEÑA INCORRECTA", "❌ La contraseña ingresada es incorrecta para el usuario 'sa'.")
@@ -101,31 +107,57 @@ def insertar_en_sql(df, tipo_archivo, password):
 
     cursor = conn.cursor()
     cursor.fast_executemany = True
+    # el checkpoint vive en SQL: se consulta con la conexión ya abierta
+    clave, inicio = preguntar_reanudar(cursor, ruta, tabla_destino, total)
 
-    total = len(df)
-    progress_bar["maximum"] = total
-    values = [tuple(row) for _, row in df.iterrows()]
-
-    for i in range(total):
-        if cancelar:
-            label_progreso.config(text="🚫 Carga cancelada por el usuario.")
-            conn.close()
-            return False
-        if i % 1000 == 0 or i == total - 1:
-            progress_bar["value"] = i + 1
-            label_progreso.config(text=f"Insertando registro {i + 1} de {total}...")
-            ventana.update_idletasks()
+    progress_bar["maximum"] = max(total, 1)
+    progress_bar["value"] = inicio
+    columnas = columnas_parametros(df)
 
-    cursor.executemany(f"""
+    sql = f"""
         INSERT INTO {tabla_destino} (
             linea, fecha_portacion, fecha_primer_ingreso, estatus_comision,
             motivo_rechazo, tipo_comision, monto, fuerza_venta,
             carrier, archivo, periodo_participacion
         ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, values)
+    """
+
+    # inserción real por lotes: commit por lote, progreso y cancelación entre lotes
+    lote = LoteAdaptativo(estimar_ancho_fila(columnas))
+    start = inicio
 
-    conn.commit()
-    conn.close()
+    try:
+        while start < total:
+            ventana.update()  # procesa el clic de CANCELAR (SUBIR y Buscar están bloqueados)
+            if cancelar:
+                label_progreso.config(text=f"🚫 Carga cancelada por el usuario ({start} de {total} cargados; se puede reanudar).")
+                devolver_conexion(conn_str, conn)
+                return False
+
+            end = min(start + lote.tamano, total)
+            t0 = time.perf_counter()
+            cursor.executemany(sql, parametros_lote(columnas, start, end))
+            if clave:
+                # mismo commit que el lote: filas y avance se confirman juntos
+                guardar_checkpoint(cursor, clave, {"tabla": tabla_destino, "total": total, "filas_confirmadas": end})
+            conn.commit()
+            lote.registrar(end - start, time.perf_counter() - t0)
+            start = end
+
+            progress_bar["value"] = end
+            label_progreso.config(text=f"Insertando registro {end} de {total}...")
+            ventana.update_idletasks()
+
+        if clave:
+            borrar_checkpoint(cursor, clave)
+            conn.commit()
+
+    except Exception as e:
+        devolver_conexion(conn_str, conn, rota=True)
+        raise e
+
+    devolver_conexion(conn_str, conn)
+    reflejar_en_espejo(df, tabla_destino, label_progreso, ventana)
     return True
 
 # =========================
@@ -137,6 +169,9 @@ def seleccionar_archivo():
     entry_ruta.insert(0, ruta)
 
 def procesar_archivo():
+    global cancelar
+    cancelar = False
+
     ruta = entry_ruta.get()
     tipo = combo_tipo.get()
     pwd = entry_pwd.get()
@@ -145,9 +180,10 @@ def procesar_archivo():
         messagebox.showerror("Error", "Por favor completa todos los campos.")
         return
 
+    bloquear_controles(True, btn_subir, btn_buscar)
     try:
         df_transformado = transformar_archivo(ruta, tipo)
-        exito = insertar_en_sql(df_transformado, tipo, pwd)
+        exito = insertar_en_sql(df_transformado, tipo, pwd, ruta=ruta)
         if not exito:
             return
 
@@ -162,6 +198,8 @@ def procesar_archivo():
         messagebox.showinfo("Éxito", f"Archivo: {nombre_formateado}\nTabla destino: {tabla_destino}\nRegistros: {len(df_transformado)}")
     except Exception as e:
         messagebox.showerror("Error", str(e))
+    finally:
+        bloquear_controles(False, btn_subir, btn_buscar)
 
 # =========================
 # GUI: Interfaz estilizada
@@ -180,7 +218,8 @@ style.configure("green.Horizontal.TProgressbar", background="#27ae60", troughcol
 tk.Label(ventana, text="Archivo Excel:", font=("Arial", 12, "bold"), bg="#f2f2f2").grid(row=0, column=0, sticky="e", padx=10, pady=10)
 entry_ruta = tk.Entry(ventana, width=50)
 entry_ruta.grid(row=0, column=1)
-tk.Button(ventana, text="Buscar", command=seleccionar_archivo, width=10).grid(row=0, column=2, padx=10)
+btn_buscar = tk.Button(ventana, text="Buscar", command=seleccionar_archivo, width=10)
+btn_buscar.grid(row=0, column=2, padx=10)
 
 tk.Label(ventana, text="Tipo de archivo:", font=("Arial", 12, "bold"), bg="#f2f2f2").grid(row=1, column=0, sticky="e", padx=10, pady=10)
 combo_tipo = ttk.Combobox(ventana, values=["INICIALES", "PERMANENCIA", "PERMANENCIA 2", "RECARGAS"], state="readonly", width=47)
@@ -194,7 +233,8 @@ entry_pwd = tk.Entry(ventana, show="*", width=20)
 entry_pwd.grid(row=3, column=1, sticky="w")
 
 # Botones
-tk.Button(ventana, text="SUBIR", command=procesar_archivo, bg="#2ecc71", fg="white", font=("Arial", 10, "bold"), width=10).grid(row=3, column=2, pady=10)
+btn_subir = tk.Button(ventana, text="SUBIR", command=procesar_archivo, bg="#2ecc71", fg="white", font=("Arial", 10, "bold"), width=10)
+btn_subir.grid(row=3, column=2, pady=10)
 tk.Button(ventana, text="CANCELAR", command=cancelar_carga, bg="#e74c3c", fg="white", font=("Arial", 10, "bold"), width=10).grid(row=4, column=2)
 
 # Barra de progreso
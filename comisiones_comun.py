@@ -0,0 +1,111 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# Helpers compartidos por los cargadores de comisiones (Cargador_Comisiones2_OP.py y
+# Cargar_Comisiones_Separación.py) y por espejo_local.py que no tocan SQL ni la interfaz
+# =========================
+
+# =========================
+# Periodo semanal: "ENERO 2025 SEM 04 - INICIALES" -> 20250104 (0 si no trae periodo)
+# Misma llave que Periodo_Semana en SQL Server; la expresión SQL equivalente está en provisionar_tablas.py
+# =========================
+MESES_NUM = {
+    m: i for i, m in enumerate(
+        ["ENERO", "FEBRERO", "MARZO", "ABRIL", "MAYO", "JUNIO", "JULIO",
+         "AGOSTO", "SEPTIEMBRE", "OCTUBRE", "NOVIEMBRE", "DICIEMBRE"], start=1)
+}
+
+def periodo_semana(archivo):
+    match = re.match(r"^([A-Z]+) (\d{4}) SEM (\d{2}) - ", str(archivo or ""))
+    if not match or match.group(1) not in MESES_NUM:
+        return 0
+    return int(match.group(2)) * 10000 + MESES_NUM[match.group(1)] * 100 + int(match.group(3))
+
+
+# =========================
+# Sanitizadores (SQL safe)
+# =========================
+def to_num_or_none(x):
+    try:
+        if x is None or pd.isna(x):
+            return None
+    except:
+        pass
+    try:
+        v = pd.to_numeric(x, errors="coerce")
+        if pd.isna(v) or v in (np.inf, -np.inf):
+            return None
+        return float(v)
+    except:
+        return None
+
+def to_str_or_none(x):
+    try:
+        if x is None or pd.isna(x):
+            return None
+    except:
+        pass
+    s = str(x).strip()
+    if s == "" or s.lower() in ("nan", "none"):
+        return None
+    return s
+
+
+# =========================
+# Duplicados dentro del archivo (Linea, Periodo_Participacion, Tipo_Comision)
+# - se descartan mientras se lee, antes de limpiar el resto de las columnas
+# - se queda la primera aparición; el set de llaves tiene tope de memoria y, si se llena,
+#   las filas que ya no cupieron se revisan con un drop_duplicates al final (mismo resultado)
+# - es opcional (casilla "Quitar duplicados", apagada por defecto): sin ella el archivo se carga completo
+# =========================
+LLAVES_DUPLICADOS = ["Linea", "Periodo_Participacion", "Tipo_Comision"]
+DUPLICADOS_MEMORIA_MB = 256
+BYTES_POR_LLAVE = 200   # tupla + valores + ranura del set (aprox.)
+
+class FiltroDuplicados:
+    def __init__(self, activo=False, memoria_mb=DUPLICADOS_MEMORIA_MB):
+        self.activo = activo
+        self.vistos = set()
+        self.max_llaves = memoria_mb * 1024 * 1024 // BYTES_POR_LLAVE
+        self.desbordado = False
+        self.descartados = 0
+
+    def es_nuevo(self, llave):
+        if not self.activo:
+            return True
+        if llave in self.vistos:
+            self.descartados += 1
+            return False
+        if len(self.vistos) < self.max_llaves:
+            self.vistos.add(llave)
+        else:
+            self.desbordado = True
+        return True
+
+    def terminar(self, df):
+        """Pasada final si el set se llenó; deja el conteo en df.attrs["duplicados"]."""
+        if self.desbordado and not df.empty:
+            antes = len(df)
+            df = df.drop_duplicates(subset=LLAVES_DUPLICADOS, keep="first")
+            self.descartados += antes - len(df)
+        self.vistos = set()
+        df.attrs["duplicados"] = self.descartados
+        return df
+
+def fila_sin_duplicar(filtro, headers_norm):
+    """Para lectores por fila (XLSB): regresa f(valores) -> True si la fila se conserva."""
+    if not filtro.activo:
+        return lambda vals: True
+    pos = [headers_norm.index(c) if c in headers_norm else None
+           for c in ("linea", "periodo_participacion", "tipo_comision")]
+    convertir = (to_num_or_none, to_num_or_none, to_str_or_none)
+
+    def es_nueva(vals):
+        llave = tuple(conv(vals[i]) if i is not None and i < len(vals) else None
+                      for i, conv in zip(pos, convertir))
+        # sin Linea la fila se descarta después de todos modos; no ocupa lugar en el set
+        return llave[0] is None or filtro.es_nuevo(llave)
+    return es_nueva
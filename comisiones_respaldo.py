@@ -0,0 +1,117 @@
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+# Respaldo XLSX en streaming
+import xlsxwriter
+
+# Respaldo Parquet (opcional)
+try:
+    import pyarrow  # noqa: F401
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+# =========================
+# Respaldo del archivo formateado (XLSX / CSV / Parquet / ninguno)
+# - XLSX en constant_memory: fila por fila desde arreglos por columna, sin armar la hoja en memoria
+# - se genera en un hilo aparte mientras corre la carga a SQL
+# - lo usan Cargador_Comisiones2_OP.py y Cargar_Comisiones_Separación.py (mismo directorio)
+# =========================
+RESPALDO_OPCIONES = ["Respaldo XLSX", "Respaldo CSV", "Respaldo Parquet", "Sin respaldo"]
+
+def guardar_excel_rapido(df, ruta_excel):
+    columnas = list(df.columns)
+    arreglos = []
+    for c in columnas:
+        col = df[c].to_numpy(dtype=object, copy=True)  # en columnas object pandas regresa una vista de solo lectura
+        col[col != col] = None  # NaN/NaT -> celda vacía
+        arreglos.append(col)
+
+    wb = xlsxwriter.Workbook(ruta_excel, {
+        "constant_memory": True,
+        "strings_to_urls": False,
+        "strings_to_formulas": False,
+    })
+    try:
+        ws = wb.add_worksheet("Datos")
+
+        header_fmt = wb.add_format({
+            "bold": True,
+            "font_name": "Arial",
+            "font_size": 12,
+            "align": "center",
+            "valign": "vcenter",
+            "text_wrap": True,
+            "border": 1
+        })
+
+        body_fmt = wb.add_format({
+            "font_name": "Arial",
+            "font_size": 12,
+            "valign": "vcenter"
+        })
+
+        fecha_fmt = wb.add_format({
+            "font_name": "Arial",
+            "font_size": 12,
+            "valign": "vcenter",
+            "num_format": "yyyy-mm-dd hh:mm:ss"
+        })
+
+        # el formato de columna aplica a las celdas escritas sin formato (fechas con su num_format)
+        for j, c in enumerate(columnas):
+            es_fecha = pd.api.types.is_datetime64_any_dtype(df[c]) or any(
+                isinstance(v, datetime) for v in arreglos[j][:200] if v is not None
+            )
+            ws.set_column(j, j, 22, fecha_fmt if es_fecha else body_fmt)
+
+        ws.write_row(0, 0, columnas, header_fmt)
+        ws.freeze_panes(1, 0)
+        ws.autofilter(0, 0, len(df), len(columnas) - 1)
+
+        # constant_memory exige escribir en orden de filas
+        for i, fila in enumerate(zip(*arreglos), start=1):
+            ws.write_row(i, 0, fila)
+    finally:
+        wb.close()
+
+def guardar_respaldo(df, ruta_origen, opcion):
+    """Escribe el respaldo elegido; regresa la ruta generada (None si no se pidió respaldo)."""
+    base = os.path.splitext(ruta_origen)[0] + "_FORMATEADO"
+    if opcion == "Respaldo XLSX":
+        ruta = base + ".xlsx"
+        guardar_excel_rapido(df, ruta)
+    elif opcion == "Respaldo Parquet" and HAS_ARROW:
+        ruta = base + ".parquet"
+        # todo como texto (igual que en el CSV): las columnas traen tipos mezclados
+        df.apply(lambda s: s.map(str, na_action="ignore")).to_parquet(ruta, index=False)
+    elif opcion in ("Respaldo CSV", "Respaldo Parquet"):  # sin pyarrow el parquet cae a CSV
+        ruta = base + ".csv"
+        df.to_csv(ruta, index=False, encoding="utf-8-sig")
+    else:
+        return None
+    return ruta
+
+def iniciar_respaldo(df, ruta_origen, opcion):
+    estado = {"ruta": None, "error": None}
+
+    def trabajo():
+        try:
+            estado["ruta"] = guardar_respaldo(df, ruta_origen, opcion)
+        except Exception as e:
+            estado["error"] = str(e)
+
+    hilo = threading.Thread(target=trabajo, name="respaldo", daemon=False)
+    hilo.start()
+    estado["hilo"] = hilo
+    return estado
+
+def esperar_respaldo(estado, ventana):
+    # mantiene viva la ventana mientras termina el hilo (SUBIR y Buscar ya están bloqueados)
+    while estado["hilo"].is_alive():
+        ventana.update()
+        estado["hilo"].join(0.1)
+    return estado
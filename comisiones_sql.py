@@ -0,0 +1,297 @@
+import os
+import time
+import atexit
+import hashlib
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+# =========================
+# Helpers SQL compartidos por los cargadores de comisiones
+# (cargador_comisiones.py, Cargador_Comisiones2_OP.py y Cargar_Comisiones_Separación.py)
+# y por Juntar_Archivos_FINAL: lo que era igual vive aquí una sola vez.
+# Sin código de interfaz: los avisos al usuario están en comisiones_ui.py
+# =========================
+
+# =========================
+# Pool de conexiones SQL (reutiliza la sesión entre cargas)
+# - también lo usa Juntar_Archivos_FINAL, cuya subida paralela pide conexiones desde varios hilos
+# =========================
+POOL_TAMANO = 4              # conexiones ociosas que se conservan por cadena de conexión
+POOL_VALIDAR_DESPUES_S = 30  # si una conexión lleva más de esto sin usarse, se valida con SELECT 1
+_pool_conexiones = {}        # hash(servidor/BD/usuario/pwd) -> [(conn, último uso)]
+_pool_lock = threading.Lock()
+
+def _llave_pool(conn_str):
+    return hashlib.sha256(conn_str.encode("utf-8")).hexdigest()
+
+def _cerrar_conexion(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+def obtener_conexion(conn_str):
+    import pyodbc  # solo al conectar: quien no sube a SQL no necesita el driver ODBC
+
+    llave = _llave_pool(conn_str)
+    while True:
+        with _pool_lock:
+            libres = _pool_conexiones.get(llave)
+            item = libres.pop() if libres else None
+        if item is None:
+            break
+        conn, ultimo_uso = item
+        if time.monotonic() - ultimo_uso < POOL_VALIDAR_DESPUES_S:
+            return conn
+        try:
+            conn.cursor().execute("SELECT 1").fetchone()
+            return conn
+        except Exception:
+            _cerrar_conexion(conn)
+    return pyodbc.connect(conn_str, autocommit=False)
+
+def devolver_conexion(conn_str, conn, rota=False):
+    # rollback deja la sesión limpia; con rota=True (la carga falló a media transacción)
+    # o si el rollback falla, la conexión se cierra en vez de volver al pool
+    try:
+        conn.rollback()
+    except Exception:
+        rota = True
+    if rota:
+        _cerrar_conexion(conn)
+        return
+    with _pool_lock:
+        libres = _pool_conexiones.setdefault(_llave_pool(conn_str), [])
+        if len(libres) < POOL_TAMANO:
+            libres.append((conn, time.monotonic()))
+            return
+    _cerrar_conexion(conn)
+
+@contextmanager
+def conexion(conn_str):
+    """with conexion(conn_str) as conn: si el bloque lanza una excepción la conexión no vuelve al pool."""
+    conn = obtener_conexion(conn_str)
+    rota = False
+    try:
+        yield conn
+    except BaseException:
+        rota = True
+        raise
+    finally:
+        devolver_conexion(conn_str, conn, rota=rota)
+
+def cerrar_pool():
+    with _pool_lock:
+        grupos = list(_pool_conexiones.values())
+        _pool_conexiones.clear()
+    for libres in grupos:
+        for conn, _ in libres:
+            _cerrar_conexion(conn)
+
+atexit.register(cerrar_pool)
+
+
+# =========================
+# Lote adaptativo: ajusta el tamaño del executemany hacia una latencia objetivo
+# sin pasar del presupuesto de memoria (filas × ancho de fila)
+# =========================
+LOTE_INICIAL = 5000
+LOTE_MIN = 500
+LOTE_MAX = 50000
+LOTE_SEGUNDOS_OBJETIVO = 1.0
+LOTE_MEMORIA_MB = 64
+
+def estimar_ancho_fila(columnas, muestra=500):
+    # texto UTF-16 + overhead por columna, medido sobre las primeras filas
+    ancho = 0
+    for col in columnas:
+        ancho += 16 + 2 * max((0 if v is None else len(str(v)) for v in col[:muestra]), default=0)
+    return max(ancho, 1)
+
+class LoteAdaptativo:
+    def __init__(self, ancho_fila, inicial=LOTE_INICIAL):
+        self.ancho_fila = ancho_fila
+        self.maximo = max(LOTE_MIN, min(LOTE_MAX, (LOTE_MEMORIA_MB * 1048576) // max(ancho_fila, 1)))
+        self.tamano = min(max(int(inicial), LOTE_MIN), self.maximo)
+        self.filas_por_seg = None
+        self.lotes = 0
+        self.filas = 0
+        self.segundos = 0.0
+
+    def registrar(self, filas, segundos):
+        self.lotes += 1
+        self.filas += filas
+        self.segundos += segundos
+        if filas <= 0 or segundos <= 0:
+            return
+        tasa = filas / segundos
+        self.filas_por_seg = tasa if self.filas_por_seg is None else 0.7 * self.filas_por_seg + 0.3 * tasa
+        # a lo más duplica / divide a la mitad por paso para no oscilar con un lote atípico
+        deseado = min(max(self.filas_por_seg * LOTE_SEGUNDOS_OBJETIVO, self.tamano / 2), self.tamano * 2)
+        self.tamano = int(min(max(deseado, LOTE_MIN), self.maximo))
+
+    def resumen(self):
+        """Tamaño final, tope, lotes enviados y filas/s promedio de toda la carga."""
+        return {
+            "lote": self.tamano,
+            "lote_max": self.maximo,
+            "lotes": self.lotes,
+            "filas_por_seg": (self.filas / self.segundos) if self.segundos else 0.0,
+        }
+
+
+# =========================
+# Parámetros por lote: arreglos por columna + zip solo del lote en curso
+# (nunca se arma la lista completa de tuplas)
+# =========================
+def columnas_parametros(df):
+    columnas = []
+    for c in df.columns:
+        col = df[c].to_numpy(dtype=object, copy=True)  # en columnas object pandas regresa una vista de solo lectura
+        col[col != col] = None  # NaN -> NULL
+        columnas.append(col)
+    return columnas
+
+def parametros_lote(columnas, start, end):
+    return list(zip(*(col[start:end] for col in columnas)))
+
+
+# =========================
+# Checkpoints de carga: filas ya confirmadas por archivo (reanudar tras una falla)
+# - viven en dbo.Checkpoints_Carga y se escriben en la misma transacción que el lote:
+#   el commit confirma las filas y el avance juntos, así que al reanudar no se repite ningún lote
+# - al terminar se borra en su propio commit; si eso no llega a confirmarse el checkpoint queda
+#   con filas_confirmadas == total y checkpoint_pendiente lo ignora
+# =========================
+TABLA_CHECKPOINTS = "dbo.Checkpoints_Carga"
+
+def huella_archivo(ruta, extra=""):
+    # ruta + tamaño + mtime + primeros/últimos 64 KB (no lee el archivo completo)
+    st = os.stat(ruta)
+    h = hashlib.sha1()
+    h.update(os.path.abspath(ruta).encode("utf-8", "replace"))
+    h.update(f"|{st.st_size}|{st.st_mtime_ns}|{extra}".encode("utf-8"))
+    with open(ruta, "rb") as f:
+        h.update(f.read(65536))
+        if st.st_size > 65536:
+            f.seek(max(st.st_size - 65536, 65536))
+            h.update(f.read(65536))
+    return h.hexdigest()
+
+def preparar_checkpoints(cursor):
+    cursor.execute(f"""
+        IF OBJECT_ID('{TABLA_CHECKPOINTS}', 'U') IS NULL
+            CREATE TABLE {TABLA_CHECKPOINTS} (
+                Clave CHAR(40) NOT NULL PRIMARY KEY,
+                Tabla NVARCHAR(255) NOT NULL,
+                Total BIGINT NOT NULL,
+                Filas_Confirmadas BIGINT NOT NULL,
+                Actualizado DATETIME2 NOT NULL DEFAULT SYSDATETIME()
+            );
+    """)
+
+def leer_checkpoint(cursor, clave):
+    cursor.execute(f"SELECT Tabla, Total, Filas_Confirmadas FROM {TABLA_CHECKPOINTS} WHERE Clave = ?", clave)
+    fila = cursor.fetchone()
+    if fila is None:
+        return None
+    return {"tabla": fila[0], "total": int(fila[1]), "filas_confirmadas": int(fila[2])}
+
+def guardar_checkpoint(cursor, clave, datos):
+    # sin commit: lo confirma quien llama, junto con el lote que acaba de insertar
+    cursor.execute(f"""
+        UPDATE {TABLA_CHECKPOINTS} WITH (UPDLOCK, SERIALIZABLE)
+        SET Tabla = ?, Total = ?, Filas_Confirmadas = ?, Actualizado = SYSDATETIME()
+        WHERE Clave = ?;
+        IF @@ROWCOUNT = 0
+            INSERT INTO {TABLA_CHECKPOINTS} (Clave, Tabla, Total, Filas_Confirmadas) VALUES (?, ?, ?, ?);
+    """, datos["tabla"], datos["total"], datos["filas_confirmadas"], clave,
+        clave, datos["tabla"], datos["total"], datos["filas_confirmadas"])
+
+def borrar_checkpoint(cursor, clave):
+    cursor.execute(f"DELETE FROM {TABLA_CHECKPOINTS} WHERE Clave = ?", clave)
+
+def checkpoint_pendiente(cursor, ruta, tabla_destino, total):
+    """Clave del checkpoint y filas que un intento anterior dejó confirmadas (0 = no hay qué reanudar)."""
+    if not ruta:
+        return None, 0
+    clave = huella_archivo(ruta, extra=f"{tabla_destino}|{total}")
+    preparar_checkpoints(cursor)
+    cursor.commit()
+    cp = leer_checkpoint(cursor, clave)
+    if cp and cp["tabla"] == tabla_destino and 0 < cp["filas_confirmadas"] < total:
+        return clave, cp["filas_confirmadas"]
+    return clave, 0
+
+
+# =========================
+# Resumen incremental por lote (rollup)
+# - cada lote se agrega en memoria y se hace MERGE a dbo.Resumen_Comisiones_* en la misma
+#   transacción del INSERT: el resumen siempre cuadra con lo confirmado (también al reanudar)
+# - el MERGE compara llaves con INTERSECT para que NULL empate con NULL
+# =========================
+RESUMEN_LLAVES = ["Archivo", "Num_Promotor", "Nombre_Supervisor", "Num_Coord", "Estatus_Comision"]
+
+def tabla_resumen(tabla_destino):
+    return tabla_destino.replace("Datos_Comisiones_", "Resumen_Comisiones_")
+
+def preparar_resumen(cursor, tabla_res):
+    llaves_ddl = ", ".join(f"{c} NVARCHAR(255) NULL" for c in RESUMEN_LLAVES)
+    cursor.execute(f"""
+        IF OBJECT_ID('{tabla_res}', 'U') IS NULL
+            CREATE TABLE {tabla_res} (
+                {llaves_ddl},
+                Registros BIGINT NOT NULL,
+                Monto_Total DECIMAL(38, 2) NOT NULL
+            );
+        IF OBJECT_ID('tempdb..#resumen_lote') IS NOT NULL DROP TABLE #resumen_lote;
+        CREATE TABLE #resumen_lote ({llaves_ddl}, Registros BIGINT NOT NULL, Monto_Total DECIMAL(38, 2) NOT NULL);
+    """)
+
+def texto_llave(v):
+    # to_num_or_none deja floats: 1234.0 se guarda como "1234"
+    if v is None:
+        return None
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+def acumular_resumen(cursor, tabla_res, df_lote):
+    llaves = df_lote[RESUMEN_LLAVES].astype(object)
+    llaves = llaves.where(llaves.notna(), None).map(texto_llave)
+    montos = pd.to_numeric(df_lote["Monto"], errors="coerce").fillna(0.0)
+    agregado = (
+        llaves.assign(Monto=montos)
+        .groupby(RESUMEN_LLAVES, dropna=False, sort=False)["Monto"]
+        .agg(["size", "sum"])
+        .reset_index()
+    )
+    agregado["sum"] = agregado["sum"].round(2)
+    cursor.executemany(
+        f"INSERT INTO #resumen_lote ({', '.join(RESUMEN_LLAVES)}, Registros, Monto_Total) "
+        f"VALUES ({', '.join(['?'] * (len(RESUMEN_LLAVES) + 2))})",
+        parametros_lote(columnas_parametros(agregado), 0, len(agregado)),
+    )
+
+    llaves_t = ", ".join(f"T.{c}" for c in RESUMEN_LLAVES)
+    llaves_s = ", ".join(f"S.{c}" for c in RESUMEN_LLAVES)
+    lista = ", ".join(RESUMEN_LLAVES)
+    # se reagrupa en SQL: dos llaves que la intercalación considera iguales no duplican el origen
+    cursor.execute(f"""
+        MERGE {tabla_res} WITH (HOLDLOCK) AS T
+        USING (
+            SELECT {lista}, SUM(Registros) AS Registros, SUM(Monto_Total) AS Monto_Total
+            FROM #resumen_lote
+            GROUP BY {lista}
+        ) AS S
+        ON EXISTS (SELECT {llaves_t} INTERSECT SELECT {llaves_s})
+        WHEN MATCHED THEN
+            UPDATE SET T.Registros = T.Registros + S.Registros,
+                       T.Monto_Total = T.Monto_Total + S.Monto_Total
+        WHEN NOT MATCHED THEN
+            INSERT ({lista}, Registros, Monto_Total)
+            VALUES ({llaves_s}, S.Registros, S.Monto_Total);
+        TRUNCATE TABLE #resumen_lote;
+    """)
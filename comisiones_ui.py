@@ -0,0 +1,53 @@
+from tkinter import messagebox
+
+from comisiones_sql import checkpoint_pendiente
+
+# Espejo local SQLite para consultas por línea (opcional)
+try:
+    import espejo_local
+    HAS_ESPEJO = True
+except ImportError:
+    HAS_ESPEJO = False
+
+# =========================
+# Helpers de interfaz compartidos por los cargadores de comisiones
+# (cargador_comisiones.py, Cargador_Comisiones2_OP.py y Cargar_Comisiones_Separación.py):
+# cada cargador arma su ventana y pasa aquí los widgets que se tocan
+# =========================
+def bloquear_controles(bloquear, *botones):
+    # mientras dura una carga la ventana sigue procesando eventos: otro clic en SUBIR arrancaría una segunda carga
+    estado = "disabled" if bloquear else "normal"
+    for btn in botones:
+        btn.config(state=estado)
+
+
+# =========================
+# Espejo local (consultas por LINEA sin tocar el servidor)
+# =========================
+def reflejar_en_espejo(df, tabla_destino, label_progreso, ventana):
+    # la carga en SQL ya quedó confirmada: si el espejo falla solo se avisa
+    if not HAS_ESPEJO:
+        return
+    try:
+        label_progreso.config(text="Actualizando espejo local...")
+        ventana.update_idletasks()
+        espejo_local.registrar_comisiones(df, tabla_destino)
+    except Exception as e:
+        messagebox.showwarning("Espejo local", f"La carga a SQL terminó, pero el espejo local no se actualizó:\n{e}")
+
+
+# =========================
+# Reanudar una carga interrumpida (el checkpoint lo lleva comisiones_sql)
+# =========================
+def preguntar_reanudar(cursor, ruta, tabla_destino, total):
+    """Clave del checkpoint y fila desde la que se carga (0 = desde el inicio)."""
+    clave, confirmadas = checkpoint_pendiente(cursor, ruta, tabla_destino, total)
+    if confirmadas and messagebox.askyesno(
+        "Carga interrumpida",
+        f"Un intento anterior de este archivo dejó {confirmadas:,} de {total:,} "
+        f"registros ya cargados en {tabla_destino}.\n\n"
+        f"¿Reanudar desde el registro {confirmadas + 1:,}?\n\n"
+        "(No = cargar todo desde el inicio; los registros ya cargados se duplicarían)"
+    ):
+        return clave, confirmadas
+    return clave, 0
@@ -0,0 +1,261 @@
+import os
+import sys
+import sqlite3
+import argparse
+from decimal import Decimal
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+# misma llave semanal que los cargadores (comisiones_comun.py, mismo directorio)
+from comisiones_comun import periodo_semana
+
+# =========================
+# Espejo local (SQLite) para consultas ad hoc sin tocar el servidor
+# - cada carga de comisiones agrega sus filas a "comisiones" (tabla destino + Archivo + periodo)
+# - cada MAESTRO generado se guarda como un corte en "maestro" (se conservan los últimos N)
+# - índices por LINEA, Archivo y periodo: historial de una línea y agregados semanales en ms
+#
+# Uso:
+#   python espejo_local.py linea 5512345678
+#   python espejo_local.py semanas [--tabla dbo.Datos_Comisiones_Iniciales] [--desde 20250101]
+#   python espejo_local.py info
+# =========================
+ESPEJO_DB = os.path.join(os.path.expanduser("~"), ".ideal_cache", "espejo.sqlite")
+ESPEJO_CORTES_MAESTRO = 4     # cortes del MAESTRO que se conservan
+ESPEJO_LOTE = 50000           # filas por executemany
+
+# Columnas de las tablas de comisiones (nombres de Datos_Comisiones_* y de tComisiones*, sin distinguir mayúsculas)
+COLUMNAS_COMISIONES = {
+    "linea": "INTEGER",
+    "fecha_portacion": "TEXT",
+    "fecha_primer_ingreso": "TEXT",
+    "estatus_comision": "TEXT",
+    "motivo_rechazo": "TEXT",
+    "tipo_comision": "TEXT",
+    "monto": "REAL",
+    "fuerza_venta": "TEXT",
+    "carrier": "TEXT",
+    "periodo_participacion": "INTEGER",
+    "region_registro": "INTEGER",
+    "num_promotor": "INTEGER",
+    "promotor": "TEXT",
+    "num_supervisor": "INTEGER",
+    "nombre_supervisor": "TEXT",
+    "grupo": "TEXT",
+    "num_coord": "INTEGER",
+    "nombre_coord": "TEXT",
+}
+
+# sqlite3 solo sabe enlazar tipos nativos de Python
+sqlite3.register_adapter(pd.Timestamp, lambda v: v.isoformat(sep=" "))
+sqlite3.register_adapter(datetime, lambda v: v.isoformat(sep=" "))
+sqlite3.register_adapter(date, lambda v: v.isoformat())
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(np.int64, int)
+sqlite3.register_adapter(np.int32, int)
+sqlite3.register_adapter(np.float64, float)
+sqlite3.register_adapter(np.bool_, bool)
+
+
+def periodo_de_fecha(d):
+    return d.year * 10000 + d.month * 100 + (d.day - 1) // 7 + 1
+
+
+def abrir(ruta=ESPEJO_DB):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    conn = sqlite3.connect(ruta)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-131072")  # 128 MB: los índices se mantienen sin ir a disco por página
+    columnas = ", ".join(f"{c} {t}" for c, t in COLUMNAS_COMISIONES.items())
+    conn.executescript(f"""
+        CREATE TABLE IF NOT EXISTS comisiones (
+            tabla TEXT NOT NULL,
+            archivo TEXT,
+            periodo INTEGER,
+            cargado TEXT NOT NULL,
+            {columnas}
+        );
+        CREATE INDEX IF NOT EXISTS ix_comisiones_linea ON comisiones (linea);
+        CREATE INDEX IF NOT EXISTS ix_comisiones_archivo ON comisiones (archivo);
+        CREATE INDEX IF NOT EXISTS ix_comisiones_periodo ON comisiones (periodo, tabla);
+
+        CREATE TABLE IF NOT EXISTS maestro (
+            corte TEXT NOT NULL,
+            periodo INTEGER NOT NULL,
+            "LINEA" INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS ix_maestro_linea ON maestro ("LINEA", corte);
+        CREATE INDEX IF NOT EXISTS ix_maestro_corte ON maestro (corte);
+        CREATE INDEX IF NOT EXISTS ix_maestro_periodo ON maestro (periodo);
+    """)
+    return conn
+
+def _columnas_tabla(conn, tabla):
+    return [r[1] for r in conn.execute(f"PRAGMA table_info({tabla})")]
+
+def _filas(df):
+    # NaN/NaT -> NULL; el resto lo convierten los adaptadores registrados arriba
+    datos = df.astype(object).where(df.notna(), None)
+    return datos.itertuples(index=False, name=None)
+
+def _insertar(conn, tabla, columnas, filas):
+    sql = (f"INSERT INTO {tabla} ({', '.join(columnas)}) "
+           f"VALUES ({', '.join(['?'] * len(columnas))})")
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= ESPEJO_LOTE:
+            conn.executemany(sql, lote)
+            lote = []
+    if lote:
+        conn.executemany(sql, lote)
+
+
+def registrar_comisiones(df, tabla, ruta=ESPEJO_DB):
+    """Agrega una carga de comisiones ya confirmada en SQL Server. Devuelve las filas escritas."""
+    if df is None or df.empty:
+        return 0
+    por_nombre = {str(c).lower(): c for c in df.columns}
+    archivo = df[por_nombre["archivo"]] if "archivo" in por_nombre else pd.Series([None] * len(df), index=df.index)
+    # Archivo es constante por carga: el periodo se calcula por valor único (0 = sin periodo -> NULL)
+    periodos = {a: periodo_semana(a) or None for a in archivo.dropna().unique()}
+
+    salida = pd.DataFrame({
+        "tabla": tabla,
+        "archivo": archivo,
+        "periodo": archivo.map(periodos),
+        "cargado": datetime.now().isoformat(sep=" ", timespec="seconds"),
+    }, index=df.index)
+    for c in COLUMNAS_COMISIONES:
+        salida[c] = df[por_nombre[c]] if c in por_nombre else None
+
+    conn = abrir(ruta)
+    try:
+        with conn:
+            _insertar(conn, "comisiones", list(salida.columns), _filas(salida))
+    finally:
+        conn.close()
+    return len(salida)
+
+def registrar_maestro(df_master, corte=None, ruta=ESPEJO_DB):
+    """Guarda el MAESTRO como un corte nuevo y descarta los cortes más viejos. Devuelve las filas escritas."""
+    if df_master is None or df_master.empty:
+        return 0
+    corte = corte or datetime.now()
+    salida = df_master.copy(deep=False)  # solo se le agregan columnas: no hace falta duplicar el MAESTRO
+    salida.insert(0, "periodo", periodo_de_fecha(corte))
+    salida.insert(0, "corte", corte.isoformat(sep=" ", timespec="seconds"))
+    columnas = [f'"{c}"' for c in salida.columns]
+
+    conn = abrir(ruta)
+    try:
+        with conn:
+            existentes = set(_columnas_tabla(conn, "maestro"))
+            for c in salida.columns:
+                if c not in existentes:
+                    conn.execute(f'ALTER TABLE maestro ADD COLUMN "{c}"')
+            _insertar(conn, "maestro", columnas, _filas(salida))
+            conn.execute(
+                "DELETE FROM maestro WHERE corte NOT IN "
+                "(SELECT DISTINCT corte FROM maestro ORDER BY corte DESC LIMIT ?)",
+                (ESPEJO_CORTES_MAESTRO,),
+            )
+    finally:
+        conn.close()
+    return len(salida)
+
+
+def historial_linea(linea, ruta=ESPEJO_DB):
+    """(comisiones de la línea por periodo, renglón de la línea en cada corte del MAESTRO)."""
+    conn = abrir(ruta)
+    try:
+        comisiones = pd.read_sql_query(
+            "SELECT * FROM comisiones WHERE linea = ? ORDER BY periodo, tabla, cargado",
+            conn, params=(int(linea),),
+        )
+        maestro = pd.read_sql_query(
+            'SELECT * FROM maestro WHERE "LINEA" = ? ORDER BY corte DESC',
+            conn, params=(int(linea),),
+        )
+    finally:
+        conn.close()
+    return comisiones, maestro
+
+def agregado_semanal(tabla=None, desde=None, hasta=None, ruta=ESPEJO_DB):
+    """Registros, líneas distintas y monto por periodo (AAAAMMSS) y tabla destino."""
+    filtros, params = [], []
+    if tabla:
+        filtros.append("tabla = ?")
+        params.append(tabla)
+    if desde:
+        filtros.append("periodo >= ?")
+        params.append(int(desde))
+    if hasta:
+        filtros.append("periodo <= ?")
+        params.append(int(hasta))
+    where = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+
+    conn = abrir(ruta)
+    try:
+        return pd.read_sql_query(
+            f"SELECT periodo, tabla, COUNT(*) AS registros, COUNT(DISTINCT linea) AS lineas, "
+            f"ROUND(SUM(monto), 2) AS monto FROM comisiones {where} "
+            f"GROUP BY periodo, tabla ORDER BY periodo, tabla",
+            conn, params=params,
+        )
+    finally:
+        conn.close()
+
+def resumen(ruta=ESPEJO_DB):
+    conn = abrir(ruta)
+    try:
+        cargas = conn.execute("SELECT COUNT(*), COUNT(DISTINCT archivo) FROM comisiones").fetchone()
+        cortes = conn.execute("SELECT corte, COUNT(*) FROM maestro GROUP BY corte ORDER BY corte DESC").fetchall()
+    finally:
+        conn.close()
+    return {"comisiones": cargas[0], "archivos": cargas[1], "cortes_maestro": cortes}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consultas sobre el espejo local de comisiones y MAESTRO.")
+    parser.add_argument("--db", default=ESPEJO_DB)
+    sub = parser.add_subparsers(dest="accion", required=True)
+
+    p_linea = sub.add_parser("linea", help="historial de una línea (comisiones + cortes del MAESTRO)")
+    p_linea.add_argument("linea")
+
+    p_sem = sub.add_parser("semanas", help="agregado por periodo y tabla")
+    p_sem.add_argument("--tabla")
+    p_sem.add_argument("--desde", type=int)
+    p_sem.add_argument("--hasta", type=int)
+
+    sub.add_parser("info", help="tamaño del espejo")
+    args = parser.parse_args(argv)
+
+    pd.set_option("display.width", 200)
+    pd.set_option("display.max_columns", 30)
+
+    if args.accion == "linea":
+        comisiones, maestro = historial_linea(args.linea, ruta=args.db)
+        print(f"Comisiones ({len(comisiones)}):")
+        print(comisiones.drop(columns=["linea"]).to_string(index=False) if len(comisiones) else "  (sin registros)")
+        for _, fila in maestro.iterrows():
+            print(f"\nMAESTRO corte {fila['corte']}:")
+            print(fila.drop(["corte", "periodo"]).dropna().to_string())
+        if maestro.empty:
+            print("\nMAESTRO: (la línea no está en los cortes guardados)")
+    elif args.accion == "semanas":
+        print(agregado_semanal(args.tabla, args.desde, args.hasta, ruta=args.db).to_string(index=False))
+    else:
+        info = resumen(ruta=args.db)
+        print(f"{args.db}\nComisiones: {info['comisiones']:,} filas de {info['archivos']:,} archivos")
+        for corte, n in info["cortes_maestro"]:
+            print(f"MAESTRO {corte}: {n:,} filas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
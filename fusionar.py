@@ -1,8 +1,18 @@
 import os
+import sys
+import argparse
+from datetime import datetime
 import pandas as pd
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
+try:
+    import polars as pl
+    HAS_POLARS = True
+except ImportError:
+    pl = None
+    HAS_POLARS = False
+
 # =========================
 # Config columnas PP/BP
 # =========================
@@ -44,6 +54,19 @@ DATE_PRIORITY_COLS = [
     "FECHA_PORTOUT",
 ]
 
+# =========================
+# Motor de fusión
+# =========================
+MERGE_ENGINES = ["polars", "pandas"]
+MERGE_ENGINE = "polars"  # si polars no está instalado se usa pandas
+
+# Textos que pandas.read_csv lee como NaN por defecto (para que polars vea los mismos vacíos)
+PANDAS_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+EXCEL_ORIGIN = datetime(1899, 12, 30)
+
 # =========================
 # Helpers rápidos
 # =========================
@@ -252,6 +275,133 @@ def merge_masters_fast(paths: list[str], progress_cb=None) -> pd.DataFrame:
 
     return out
 
+# =========================
+# Merge con polars (lazy)
+# - cada archivo se escanea y calcula su __ROW_DATE__ por separado (igual que en pandas)
+# - "último no vacío por LINEA" = un solo group_by sobre las filas ordenadas por fecha
+# - el optimizador poda columnas y reparte el trabajo entre núcleos
+# =========================
+def _pl_non_empty(expr):
+    """Mismo criterio que non_empty_mask: NaN, "", "nan", "none", "null" cuentan como vacío."""
+    txt = expr.cast(pl.String).str.strip_chars()
+    return expr.is_not_null() & (txt != "") & ~txt.str.to_lowercase().is_in(["nan", "none", "null"])
+
+def _pl_to_float(expr):
+    """Equivalente a to_float_series."""
+    txt = expr.cast(pl.String).str.strip_chars().str.replace_all("%", "", literal=True).str.replace_all(",", "", literal=True)
+    # "NAN", " nan"... se castean a NaN, que fill_null no limpia; en pandas son NaN -> fillna(0)
+    return txt.cast(pl.Float64, strict=False).fill_nan(None)
+
+def _text_to_datetime(s):
+    # el texto se deja a pandas: infiere el formato con el primer valor, como excel_serial_to_datetime
+    out = pd.to_datetime(s.to_pandas(), errors="coerce", dayfirst=False)
+    return pl.Series(s.name, out.to_numpy(dtype="datetime64[ns]"), dtype=pl.Datetime("ns"))
+
+def _pl_excel_serial_to_datetime(col: str):
+    nums = pl.col(col).str.strip_chars().cast(pl.Float64, strict=False)
+    is_excel = nums.is_not_null() & (nums > 59) & (nums < 90000)
+    serial = (pl.lit(EXCEL_ORIGIN).cast(pl.Datetime("ns"))
+              + pl.duration(nanoseconds=(nums * 86_400_000_000_000).round().cast(pl.Int64)))
+    text = (pl.when(~is_excel).then(pl.col(col))
+            .map_batches(_text_to_datetime, return_dtype=pl.Datetime("ns")))
+    return pl.when(is_excel).then(serial).otherwise(text)
+
+def _pl_read_any(path: str):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        lf = pl.scan_csv(path, infer_schema=False, null_values=PANDAS_NA_VALUES, encoding="utf8")
+        # pandas se salta las líneas en blanco; polars las lee como filas nulas
+        return lf.filter(pl.any_horizontal(pl.all().is_not_null()))
+    # Excel: se lee con pandas (mismos motores) y se pasa a texto
+    return pl.from_pandas(read_any(path).astype("string")).lazy()
+
+def merge_masters_polars(paths: list[str], progress_cb=None) -> pd.DataFrame:
+    """Mismo resultado que merge_masters_fast, resuelto en una consulta lazy de polars."""
+    frames = []
+    n = max(len(paths), 1)
+
+    # 1) Escanear cada archivo y su fecha de fila
+    for i, p in enumerate(paths, start=1):
+        if callable(progress_cb):
+            progress_cb(int((i - 1) / n * 20), f"Escaneando: {os.path.basename(p)}")
+
+        lf = _pl_read_any(p)
+        cols = lf.collect_schema().names()
+        if "LINEA" not in cols:
+            raise ValueError(f"El archivo no trae columna LINEA: {p}")
+
+        date_cols = [c for c in DATE_PRIORITY_COLS if c in cols]
+        row_date = (pl.max_horizontal([_pl_excel_serial_to_datetime(c) for c in date_cols]) if date_cols
+                    else pl.lit(None, dtype=pl.Datetime("ns")))
+        frames.append(lf.with_columns(row_date.alias("__ROW_DATE__")))
+
+    if callable(progress_cb):
+        progress_cb(25, "Armando consulta...")
+
+    all_lf = pl.concat(frames, how="diagonal_relaxed")
+    columns = [c for c in all_lf.collect_schema().names() if c != "__ROW_DATE__"]
+
+    # 2) Orden estable por fecha (sin fecha = al final, como sort_values de pandas)
+    all_lf = (all_lf.with_row_index("__ORDER__")
+              .sort(["__ROW_DATE__", "__ORDER__"], nulls_last=True)
+              .with_row_index("__POS__"))
+
+    # 3) Bloques PP/BP: marca de "trae algo" por fila
+    blocks = [pp_block_cols(pp) for pp in PP_LIST] + [BP1_COLS, BP2_COLS]
+    block_of = {}
+    masks = []
+    for b, cols in enumerate(blocks):
+        cols_present = [c for c in cols if c in columns]
+        if not cols_present:
+            continue
+        masks.append(pl.any_horizontal([_pl_non_empty(pl.col(c)) for c in cols_present]).alias(f"__M{b}__"))
+        for c in cols_present:
+            block_of[c] = f"__M{b}__"
+    if masks:
+        all_lf = all_lf.with_columns(masks)
+
+    # 4) Por LINEA: base = fila más nueva; columnas de bloque = fila más nueva con ese bloque lleno
+    #    (dentro de cada grupo polars respeta el orden, así que last() es la más nueva)
+    aggs = [pl.col("__POS__").max()]
+    for c in columns:
+        if c == "LINEA":
+            continue
+        if c in block_of:
+            picked = pl.col(c).filter(pl.col(block_of[c])).last()
+            aggs.append(pl.when(_pl_non_empty(picked)).then(picked).otherwise(pl.col(c).last()).alias(c))
+        else:
+            aggs.append(pl.col(c).last())
+
+    merged = all_lf.group_by("LINEA").agg(aggs).sort("__POS__").select(columns)
+
+    # 5) INGRESO_TOTAL (mismo orden de suma que recompute_ingreso_total)
+    ingreso = _pl_to_float(pl.col("MONTO_COM_INIC")).fill_null(0) if "MONTO_COM_INIC" in columns else pl.lit(0.0)
+    for c in [PP_MONTO_COL[pp] for pp in PP_LIST] + ["MONTO_BP1", "MONTO_BP2"]:
+        if c in columns:
+            ingreso = ingreso + _pl_to_float(pl.col(c)).fill_null(0)
+    merged = merged.with_columns(ingreso.cast(pl.Float64).alias("INGRESO_TOTAL"))
+
+    if callable(progress_cb):
+        progress_cb(40, "Ejecutando consulta (polars)...")
+
+    out = merged.collect()
+
+    if callable(progress_cb):
+        progress_cb(95, "Convirtiendo resultado...")
+
+    out = out.to_pandas()
+
+    if callable(progress_cb):
+        progress_cb(100, "Listo ✅")
+
+    return out
+
+def merge_masters(paths: list[str], progress_cb=None, engine: str = None) -> pd.DataFrame:
+    engine = engine or MERGE_ENGINE
+    if engine == "polars" and HAS_POLARS:
+        return merge_masters_polars(paths, progress_cb=progress_cb)
+    return merge_masters_fast(paths, progress_cb=progress_cb)
+
 # =========================
 # GUI
 # =========================
@@ -292,6 +442,11 @@ class MergeApp(tk.Tk):
 
         tk.Button(row2, text="Salir", width=12, command=self.destroy).pack(side="left", padx=10)
 
+        engines = MERGE_ENGINES if HAS_POLARS else ["pandas"]
+        self.engine = tk.StringVar(value=MERGE_ENGINE if MERGE_ENGINE in engines else "pandas")
+        ttk.Combobox(row2, textvariable=self.engine, values=engines, state="readonly", width=10).pack(side="right")
+        tk.Label(row2, text="Motor:").pack(side="right", padx=(0, 6))
+
         self.progress = ttk.Progressbar(card, orient="horizontal", length=100, mode="determinate")
         self.progress.pack(fill="x", padx=12, pady=(20, 6))
 
@@ -350,7 +505,7 @@ class MergeApp(tk.Tk):
         self.update_idletasks()
 
         try:
-            merged = merge_masters_fast(self.paths, progress_cb=self._progress_cb)
+            merged = merge_masters(self.paths, progress_cb=self._progress_cb, engine=self.engine.get())
             self._progress_cb(98, "Guardando CSV...")
             merged.to_csv(out_path, index=False, encoding="utf-8-sig")
             self._progress_cb(100, "Listo ✅")
@@ -363,6 +518,25 @@ class MergeApp(tk.Tk):
             self.btn_merge.config(state="normal")
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fusiona MAESTROS por LINEA. Sin archivos abre la ventana.")
+    parser.add_argument("archivos", nargs="*", help="MAESTROS (CSV/XLSX/XLS/XLSB)")
+    parser.add_argument("-o", "--salida", default="MAESTRO_UNIFICADO.csv")
+    parser.add_argument("--motor", choices=MERGE_ENGINES, default=MERGE_ENGINE)
+    args = parser.parse_args(argv)
+
+    if not args.archivos:
+        MergeApp().mainloop()
+        return 0
+
+    if args.motor == "polars" and not HAS_POLARS:
+        print("polars no está instalado; se usa pandas.")
+    merged = merge_masters(args.archivos, progress_cb=lambda pct, msg: print(f"[{pct:3d}%] {msg}"), engine=args.motor)
+    merged.to_csv(args.salida, index=False, encoding="utf-8-sig")
+    print(f"Se creó: {args.salida} (filas: {len(merged):,})")
+    return 0
+
+
 if __name__ == "__main__":
-    # pip install pandas openpyxl pyxlsb
-    MergeApp().mainloop()
+    # pip install pandas openpyxl pyxlsb polars
+    sys.exit(main())
@@ -0,0 +1,229 @@
+import os
+import sys
+import argparse
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pyarrow  # noqa: F401  (deltas en parquet)
+
+# =========================
+# Historial versionado del MAESTRO (solo cambios por semana)
+# - cada renglón lleva una huella (hash estable de sus columnas en texto, como quedan en el CSV)
+# - por semana ISO se guarda un parquet con los renglones nuevos o cambiados y las bajas
+# - el MAESTRO "al corte de la semana N" = última versión de cada LINEA en las semanas <= N
+# - cambios(A, B) lee solo los deltas entre A y B
+#
+# Uso:
+#   python historial_maestro.py registrar MAESTRO.csv [--semana 202542]
+#   python historial_maestro.py al 202540 -o MAESTRO_202540.csv
+#   python historial_maestro.py cambios 202540 202542 [-o cambios.csv]
+#   python historial_maestro.py info
+# =========================
+HISTORIAL_DIR = os.path.join(os.path.expanduser("~"), ".ideal_cache", "maestro_historial")
+
+LLAVE = "LINEA"
+COL_N = "__N__"          # ocurrencia de la LINEA en el MAESTRO (0 salvo LINEAS repetidas)
+COL_HASH = "__HASH__"
+COL_BAJA = "__BAJA__"
+COL_SEMANA = "__SEMANA__"
+COLUMNAS_CONTROL = [COL_N, COL_HASH, COL_BAJA]
+
+
+def semana_iso(fecha=None) -> int:
+    """date -> AAAASS (año y semana ISO), p. ej. 202542."""
+    anio, semana, _ = (fecha or date.today()).isocalendar()
+    return anio * 100 + semana
+
+def _ruta_semana(semana, ruta):
+    return os.path.join(ruta, f"{int(semana)}.parquet")
+
+def semanas(ruta=HISTORIAL_DIR) -> list[int]:
+    if not os.path.isdir(ruta):
+        return []
+    return sorted(int(n[:-8]) for n in os.listdir(ruta) if n.endswith(".parquet") and n[:-8].isdigit())
+
+
+def a_texto(df: pd.DataFrame) -> pd.DataFrame:
+    """Cada celda como texto (lo mismo que escribe to_csv); vacíos -> None."""
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        out[col] = s.astype(str).astype(object).where(s.notna(), None)
+    return pd.DataFrame(out, index=df.index)
+
+def huellas(texto: pd.DataFrame) -> np.ndarray:
+    """Hash estable por renglón (siphash de pandas con llave fija): no depende de la corrida ni del equipo."""
+    # \x00 separa "vacío" de cualquier texto real
+    return pd.util.hash_pandas_object(texto.fillna("\x00"), index=False).to_numpy(np.uint64)
+
+def _con_ocurrencia(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy(deep=False)
+    df[COL_N] = df.groupby(LLAVE, sort=False, dropna=False).cumcount().astype(np.int32)
+    return df
+
+
+def _leer(lista, ruta, columnas=None) -> pd.DataFrame:
+    partes = []
+    for semana in lista:
+        parte = pd.read_parquet(_ruta_semana(semana, ruta), columns=columnas)
+        parte[COL_SEMANA] = semana
+        partes.append(parte)
+    if not partes:
+        return pd.DataFrame(columns=[LLAVE] + COLUMNAS_CONTROL + [COL_SEMANA])
+    return pd.concat(partes, ignore_index=True)
+
+def _ultimas(df: pd.DataFrame) -> pd.DataFrame:
+    """Última versión de cada (LINEA, ocurrencia); las semanas ya vienen en orden."""
+    return df.drop_duplicates(subset=[LLAVE, COL_N], keep="last")
+
+
+def registrar_semana(df_master: pd.DataFrame, semana=None, ruta=HISTORIAL_DIR) -> dict:
+    """Guarda el MAESTRO de la semana como delta contra la semana anterior registrada.
+
+    Registrar de nuevo la misma semana reemplaza su delta; una semana anterior a la última no se acepta
+    (los deltas posteriores quedarían calculados contra otra base).
+    """
+    semana = int(semana or semana_iso())
+    registradas = semanas(ruta)
+    if registradas and semana < registradas[-1]:
+        raise ValueError(f"La semana {semana} es anterior a la última registrada ({registradas[-1]}).")
+
+    texto = _con_ocurrencia(a_texto(df_master))
+    texto[COL_HASH] = huellas(texto.drop(columns=[COL_N]))
+    texto[COL_BAJA] = False
+
+    previas = [s for s in registradas if s < semana]
+    estado = _ultimas(_leer(previas, ruta, columnas=[LLAVE] + COLUMNAS_CONTROL))
+    estado = estado[~estado[COL_BAJA].astype(bool)]
+
+    # por llave (LINEA, ocurrencia) y por llave + huella: sin merge, el hash no pasa por float
+    vigentes = pd.MultiIndex.from_frame(texto[[LLAVE, COL_N]])
+    existia = vigentes.isin(pd.MultiIndex.from_frame(estado[[LLAVE, COL_N]]))
+    igual = pd.MultiIndex.from_frame(texto[[LLAVE, COL_N, COL_HASH]]).isin(
+        pd.MultiIndex.from_frame(estado[[LLAVE, COL_N, COL_HASH]])
+    )
+    nuevos = ~existia
+    cambios = existia & ~igual
+
+    bajas = estado[~pd.MultiIndex.from_frame(estado[[LLAVE, COL_N]]).isin(vigentes)]
+    bajas = pd.DataFrame({LLAVE: bajas[LLAVE].to_numpy(), COL_N: bajas[COL_N].to_numpy(np.int32),
+                          COL_HASH: np.uint64(0), COL_BAJA: True})
+
+    delta = pd.concat([texto[nuevos | cambios], bajas], ignore_index=True)
+    delta = delta[[LLAVE] + [c for c in delta.columns if c != LLAVE]]
+
+    os.makedirs(ruta, exist_ok=True)
+    destino = _ruta_semana(semana, ruta)
+    tmp = destino + ".tmp"
+    delta.to_parquet(tmp, index=False, compression="zstd")
+    os.replace(tmp, destino)
+    return {
+        "semana": semana,
+        "nuevos": int(nuevos.sum()),
+        "cambios": int(cambios.sum()),
+        "bajas": len(bajas),
+        "sin_cambio": int(len(texto) - nuevos.sum() - cambios.sum()),
+    }
+
+def maestro_al(semana, ruta=HISTORIAL_DIR) -> pd.DataFrame:
+    """MAESTRO vigente al corte de la semana (texto, ordenado por LINEA)."""
+    lista = [s for s in semanas(ruta) if s <= int(semana)]
+    if not lista:
+        raise ValueError(f"No hay semanas registradas hasta {semana}.")
+    todo = _ultimas(_leer(lista, ruta))
+    todo = todo[~todo[COL_BAJA].astype(bool)]
+    # columnas en el orden en que fueron apareciendo en las semanas
+    columnas = [c for c in todo.columns if c not in COLUMNAS_CONTROL + [COL_SEMANA]]
+    out = todo.sort_values([LLAVE, COL_N], kind="mergesort")[columnas].reset_index(drop=True).astype(object)
+    return out.where(out.notna(), None)
+
+def cambios(desde, hasta, ruta=HISTORIAL_DIR) -> pd.DataFrame:
+    """Renglones que cambiaron entre dos cortes: ESTADO (NUEVO/CAMBIO/BAJA), columnas cambiadas y valores a 'hasta'."""
+    registradas = semanas(ruta)
+    rango = [s for s in registradas if int(desde) < s <= int(hasta)]
+    delta = _ultimas(_leer(rango, ruta))
+    antes = _ultimas(_leer([s for s in registradas if s <= int(desde)], ruta))
+    antes = antes[~antes[COL_BAJA].astype(bool)]
+
+    columnas = [c for c in delta.columns if c not in COLUMNAS_CONTROL + [COL_SEMANA]]
+    cruce = delta.merge(antes, on=[LLAVE, COL_N], how="left", suffixes=("", "__ANT"), indicator=True)
+    previo = (cruce["_merge"] == "both").to_numpy()
+    baja = cruce[COL_BAJA].astype(bool).to_numpy()
+
+    comparables = [c for c in columnas if c != LLAVE]
+    distintas = {}
+    for c in comparables:
+        nuevo = cruce[c]
+        ant = cruce[f"{c}__ANT"] if f"{c}__ANT" in cruce.columns else pd.Series(None, index=cruce.index, dtype=object)
+        distintas[c] = ~((nuevo == ant) | (nuevo.isna() & ant.isna())).to_numpy()
+    cambiadas = np.array(
+        [", ".join(c for c in comparables if distintas[c][i]) for i in range(len(cruce))], dtype=object
+    ) if len(cruce) else np.array([], dtype=object)
+
+    estado = np.where(~previo, "NUEVO", np.where(baja, "BAJA", "CAMBIO"))
+    # se descartan: altas que se dieron de baja dentro del rango y cambios que regresaron al valor original
+    quedan = ~(~previo & baja) & ~((estado == "CAMBIO") & (cambiadas == ""))
+
+    out = pd.DataFrame({"ESTADO": estado, "COLUMNAS_CAMBIADAS": np.where(baja, "", cambiadas)})
+    for c in columnas:
+        valores = cruce[c]
+        if c != LLAVE and f"{c}__ANT" in cruce.columns:
+            valores = valores.where(~baja, cruce[f"{c}__ANT"])   # de las bajas se muestra el último valor conocido
+        out[c] = valores.to_numpy()
+    return out[quedan].sort_values([LLAVE, "ESTADO"], kind="mergesort").reset_index(drop=True)
+
+def resumen(ruta=HISTORIAL_DIR) -> list[tuple]:
+    """[(semana, renglones en el delta, bajas, bytes)]"""
+    out = []
+    for semana in semanas(ruta):
+        path = _ruta_semana(semana, ruta)
+        baja = pd.read_parquet(path, columns=[COL_BAJA])[COL_BAJA]
+        out.append((semana, len(baja), int(baja.sum()), os.path.getsize(path)))
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Historial semanal del MAESTRO (solo cambios).")
+    parser.add_argument("--dir", default=HISTORIAL_DIR)
+    sub = parser.add_subparsers(dest="accion", required=True)
+
+    p_reg = sub.add_parser("registrar", help="agrega un MAESTRO.csv como la versión de una semana")
+    p_reg.add_argument("csv")
+    p_reg.add_argument("--semana", type=int, help="AAAASS (ISO); por defecto la semana actual")
+
+    p_al = sub.add_parser("al", help="MAESTRO vigente al corte de una semana")
+    p_al.add_argument("semana", type=int)
+    p_al.add_argument("-o", "--salida")
+
+    p_cam = sub.add_parser("cambios", help="renglones nuevos, cambiados o dados de baja entre dos semanas")
+    p_cam.add_argument("desde", type=int)
+    p_cam.add_argument("hasta", type=int)
+    p_cam.add_argument("-o", "--salida")
+
+    sub.add_parser("info", help="semanas registradas y tamaño de cada delta")
+    args = parser.parse_args(argv)
+
+    if args.accion == "registrar":
+        df = pd.read_csv(args.csv, dtype=object, encoding="utf-8-sig", keep_default_na=False, na_values=[""])
+        r = registrar_semana(df, args.semana, ruta=args.dir)
+        print(f"Semana {r['semana']}: {r['nuevos']:,} nuevos, {r['cambios']:,} cambios, "
+              f"{r['bajas']:,} bajas, {r['sin_cambio']:,} sin cambio")
+    elif args.accion in ("al", "cambios"):
+        df = maestro_al(args.semana, ruta=args.dir) if args.accion == "al" else cambios(args.desde, args.hasta, ruta=args.dir)
+        if args.salida:
+            df.to_csv(args.salida, index=False, encoding="utf-8-sig")
+            print(f"Se creó: {args.salida} ({len(df):,} filas)")
+        else:
+            print(df.to_string(index=False, max_rows=50))
+    else:
+        total = 0
+        for semana, filas, bajas, size in resumen(ruta=args.dir):
+            total += size
+            print(f"{semana}: {filas:,} renglones ({bajas:,} bajas), {size / 1024:,.0f} KB")
+        print(f"Total: {total / 1024 / 1024:,.1f} MB en {args.dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
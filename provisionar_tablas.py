@@ -0,0 +1,363 @@
+import os
+import sys
+import getpass
+import argparse
+import importlib.util
+import importlib.machinery
+from datetime import date, timedelta
+
+# meses de la llave semanal, los mismos de periodo_semana() (comisiones_comun.py, mismo directorio)
+from comisiones_comun import MESES_NUM
+
+# =========================
+# Provisionamiento de tablas (particiones semanales + columnstore + ventana deslizante)
+# - dbo.Datos_Comisiones_*: partición por Periodo_Semana (AAAAMMSS) derivado de Archivo
+#   ("ENERO 2025 SEM 04 - INICIALES" -> 20250104); lo llena el cargador al insertar
+# - dbo.Datos_Integrales: partición por Fecha_Carga (DEFAULT = día de la carga), semanas lunes-domingo
+# - todas con CLUSTERED COLUMNSTORE alineado al esquema de partición
+# - semanas fuera de la ventana se mueven con SWITCH a <tabla>_Archivo (también columnstore)
+#
+# Uso:
+#   python provisionar_tablas.py script                      (imprime el DDL de creación, sin conectar)
+#   python provisionar_tablas.py aplicar  [--simular]        (crea o migra las tablas)
+#   python provisionar_tablas.py deslizar [--simular]        (agrega semanas nuevas y archiva las viejas)
+# =========================
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_SQL_SERVER = "192.168.10.68"
+DEFAULT_SQL_PORT = "1433"
+SQL_DB = "DatosLocales"
+SQL_USER = "sa"
+
+MESES_VIVOS = 12      # meses que se quedan en la tabla viva
+MESES_ADELANTE = 2    # semanas futuras ya particionadas (SPLIT sobre particiones vacías)
+FILEGROUP = "PRIMARY"
+
+
+def cargar_modulo(nombre, ruta):
+    # Juntar_Archivos_FINAL no tiene extensión .py; ambos scripts protegen su GUI con __main__
+    loader = importlib.machinery.SourceFileLoader(nombre, ruta)
+    spec = importlib.util.spec_from_loader(nombre, loader)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    loader.exec_module(modulo)
+    return modulo
+
+
+# =========================
+# Esquema (el mismo que usan los cargadores)
+# =========================
+def esquema_comisiones():
+    sep = cargar_modulo("cargar_comisiones_separacion", os.path.join(RAIZ, "Cargar_Comisiones_Separación.py"))
+    columnas = [(c, t, "NULL") for c, t in sep.COLUMNAS_SQL.items()]
+    tablas = sorted(set(sep.TABLAS_COMISIONES.values()))
+    return tablas, columnas, sep.COLUMNA_PERIODO, MESES_NUM
+
+def tipo_integrales(header):
+    h = header.upper()
+    if h.startswith("FECHA"):
+        return "DATETIME"
+    if h.startswith("PCTJE"):
+        return "DECIMAL(9, 4)"
+    if h.startswith(("MONTO", "REC_TOTAL", "INGRESO_TOTAL")):
+        return "DECIMAL(18, 2)"
+    return "NVARCHAR(255)"
+
+def esquema_integrales():
+    juntar = cargar_modulo("juntar_archivos_final", os.path.join(RAIZ, "Juntar_Archivos_FINAL"))
+    columnas = []
+    vistos = set()
+    for h in juntar.MASTER_HEADERS:
+        nombre = juntar.SQL_MANUAL_MAP.get(h, h.title())
+        if nombre not in vistos:
+            vistos.add(nombre)
+            columnas.append((nombre, tipo_integrales(h), "NULL"))
+    return juntar.SQL_TABLE, columnas
+
+def periodo_desde_archivo_sql(meses_num):
+    # misma regla que periodo_semana() del cargador; solo se usa para rellenar filas ya existentes
+    p = "CHARINDEX(' ', Archivo)"
+    casos = " ".join(f"WHEN '{m}' THEN {n}" for m, n in meses_num.items())
+    return (
+        f"CASE WHEN SUBSTRING(Archivo, {p} + 1, 13) LIKE '[0-9][0-9][0-9][0-9] SEM [0-9][0-9] -' "
+        f"THEN ISNULL(CAST(SUBSTRING(Archivo, {p} + 1, 4) AS INT) * 10000 "
+        f"+ (CASE LEFT(Archivo, {p} - 1) {casos} END) * 100 "
+        f"+ CAST(SUBSTRING(Archivo, {p} + 10, 2) AS INT), 0) "
+        f"ELSE 0 END"
+    )
+
+
+# =========================
+# Fronteras de partición (RANGE RIGHT: cada frontera abre una semana)
+# =========================
+def inicio_de_mes(d, meses):
+    total = d.year * 12 + (d.month - 1) + meses
+    return date(total // 12, total % 12 + 1, 1)
+
+def fronteras_semana_archivo(desde, hasta):
+    # SEM 01..05 de cada mes
+    out = []
+    mes = desde
+    while mes <= hasta:
+        out.extend(mes.year * 10000 + mes.month * 100 + s for s in range(1, 6))
+        mes = inicio_de_mes(mes, 1)
+    return out
+
+def fronteras_lunes(desde, hasta):
+    lunes = desde + timedelta(days=(7 - desde.weekday()) % 7)
+    out = []
+    while lunes <= hasta:
+        out.append(lunes)
+        lunes += timedelta(days=7)
+    return out
+
+
+class TablaParticionada:
+    def __init__(self, tabla, columnas, columna_llave, tipo_llave, ddl_llave,
+                 fronteras, fijas=(), relleno=None):
+        self.tabla = tabla
+        self.schema, self.nombre = tabla.split(".", 1)
+        self.columnas = columnas
+        self.columna_llave = columna_llave
+        self.tipo_llave = tipo_llave        # "INT" o "DATE"
+        self.ddl_llave = ddl_llave          # definición completa de la columna llave
+        self.fronteras = fronteras          # f(desde, hasta) -> lista de valores
+        self.fijas = list(fijas)            # fronteras que nunca se archivan (p. ej. "sin periodo")
+        self.relleno = relleno              # expresión para rellenar la llave al migrar
+
+        self.pf = f"pf_{self.nombre}"
+        self.ps = f"ps_{self.nombre}"
+        self.cci = f"CCI_{self.nombre}"
+        self.archivo = f"{self.schema}.{self.nombre}_Archivo"
+        self.salida = f"{self.schema}.{self.nombre}_Salida"
+
+    def literal(self, v):
+        return f"'{v.isoformat()}'" if isinstance(v, date) else str(int(v))
+
+    def ventana(self, hoy, meses_vivos, meses_adelante):
+        desde = inicio_de_mes(hoy, -meses_vivos)
+        return desde, self.fronteras(desde, inicio_de_mes(hoy, meses_adelante))
+
+    def ddl_funcion(self, fronteras):
+        valores = ", ".join(self.literal(v) for v in self.fijas + fronteras)
+        return [
+            f"IF NOT EXISTS (SELECT 1 FROM sys.partition_functions WHERE name = N'{self.pf}') "
+            f"CREATE PARTITION FUNCTION {self.pf} ({self.tipo_llave}) AS RANGE RIGHT FOR VALUES ({valores});",
+            f"IF NOT EXISTS (SELECT 1 FROM sys.partition_schemes WHERE name = N'{self.ps}') "
+            f"CREATE PARTITION SCHEME {self.ps} AS PARTITION {self.pf} ALL TO ([{FILEGROUP}]);",
+        ]
+
+    def ddl_tabla(self):
+        cols = ",\n    ".join(f"[{c}] {t} {n}" for c, t, n in self.columnas)
+        return [
+            f"CREATE TABLE {self.tabla} (\n    {cols},\n    {self.ddl_llave}\n) ON {self.ps}([{self.columna_llave}]);",
+            f"CREATE CLUSTERED COLUMNSTORE INDEX {self.cci} ON {self.tabla} ON {self.ps}([{self.columna_llave}]);",
+        ]
+
+    def ddl_archivo(self):
+        # mismo esquema, sin partición: recibe las semanas que salen de la ventana
+        return [
+            f"IF OBJECT_ID(N'{self.archivo}', 'U') IS NULL "
+            f"SELECT TOP 0 * INTO {self.archivo} FROM {self.tabla};",
+            f"IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE object_id = OBJECT_ID(N'{self.archivo}') AND type = 5) "
+            f"CREATE CLUSTERED COLUMNSTORE INDEX CCI_{self.nombre}_Archivo ON {self.archivo};",
+        ]
+
+    def script_creacion(self, hoy, meses_vivos, meses_adelante):
+        _, fronteras = self.ventana(hoy, meses_vivos, meses_adelante)
+        return self.ddl_funcion(fronteras) + self.ddl_tabla() + self.ddl_archivo()
+
+
+def tablas_objetivo():
+    tablas_com, columnas_com, col_periodo, meses_num = esquema_comisiones()
+    tabla_int, columnas_int = esquema_integrales()
+
+    objetivo = [
+        TablaParticionada(
+            t, columnas_com, col_periodo, "INT",
+            f"[{col_periodo}] INT NOT NULL CONSTRAINT DF_{t.split('.', 1)[1]}_{col_periodo} DEFAULT (0)",
+            fronteras_semana_archivo, fijas=[1], relleno=periodo_desde_archivo_sql(meses_num),
+        )
+        for t in tablas_com
+    ]
+    objetivo.append(TablaParticionada(
+        tabla_int, columnas_int, "Fecha_Carga", "DATE",
+        f"[Fecha_Carga] DATE NOT NULL CONSTRAINT DF_{tabla_int.split('.', 1)[1]}_Fecha_Carga "
+        f"DEFAULT (CAST(SYSDATETIME() AS DATE))",
+        fronteras_lunes,
+    ))
+    return objetivo
+
+
+# =========================
+# Ejecución
+# =========================
+class Sesion:
+    def __init__(self, conn, simular):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.simular = simular
+
+    def consulta(self, sql, *params):
+        self.cursor.execute(sql, *params)
+        return self.cursor.fetchall()
+
+    def ejecutar(self, sql):
+        print(sql if sql.endswith(";") else sql + ";")
+        if not self.simular:
+            self.cursor.execute(sql)
+
+    def confirmar(self):
+        if self.simular:
+            self.conn.rollback()
+        else:
+            self.conn.commit()
+
+
+def fronteras_actuales(s, t):
+    filas = s.consulta(
+        f"SELECT CAST(rv.value AS {t.tipo_llave}) FROM sys.partition_range_values rv "
+        "JOIN sys.partition_functions pf ON pf.function_id = rv.function_id "
+        "WHERE pf.name = ? ORDER BY rv.boundary_id",
+        t.pf,
+    )
+    return [f[0] for f in filas]
+
+def aplicar(s, t, hoy, meses_vivos, meses_adelante):
+    print(f"\n-- ===== {t.tabla} =====")
+    _, fronteras = t.ventana(hoy, meses_vivos, meses_adelante)
+    for sql in t.ddl_funcion(fronteras):
+        s.ejecutar(sql)
+
+    existe = s.consulta("SELECT OBJECT_ID(?, 'U')", t.tabla)[0][0] is not None
+    if not existe:
+        for sql in t.ddl_tabla():
+            s.ejecutar(sql)
+    else:
+        columnas = {c.lower() for (c,) in s.consulta(
+            "SELECT name FROM sys.columns WHERE object_id = OBJECT_ID(?)", t.tabla)}
+        if t.columna_llave.lower() not in columnas:
+            s.ejecutar(f"ALTER TABLE {t.tabla} ADD {t.ddl_llave};")
+            if t.relleno:
+                # el ALTER se compila antes de existir la columna: el UPDATE va en otro lote
+                s.ejecutar(f"UPDATE {t.tabla} SET [{t.columna_llave}] = {t.relleno};")
+
+        # índice clúster actual: 0 = heap, 1 = rowstore, 5 = columnstore
+        filas = s.consulta(
+            "SELECT i.name, i.type, i.is_primary_key, i.is_unique_constraint, ds.type "
+            "FROM sys.indexes i JOIN sys.data_spaces ds ON ds.data_space_id = i.data_space_id "
+            "WHERE i.object_id = OBJECT_ID(?) AND i.index_id IN (0, 1)",
+            t.tabla,
+        )
+        nombre, tipo, es_pk, es_unique, espacio = filas[0]
+        destino = f"ON {t.ps}([{t.columna_llave}])"
+        if tipo == 5 and espacio == "PS":
+            print(f"-- {t.tabla} ya es columnstore particionado")
+        elif tipo == 0:
+            s.ejecutar(f"CREATE CLUSTERED COLUMNSTORE INDEX {t.cci} ON {t.tabla} {destino};")
+        elif es_pk or es_unique:
+            print(f"-- AVISO: se elimina la restricción {nombre} (columnstore no admite PK/UNIQUE clúster)")
+            s.ejecutar(f"ALTER TABLE {t.tabla} DROP CONSTRAINT [{nombre}];")
+            s.ejecutar(f"CREATE CLUSTERED COLUMNSTORE INDEX {t.cci} ON {t.tabla} {destino};")
+        else:
+            s.ejecutar(f"CREATE CLUSTERED COLUMNSTORE INDEX [{nombre}] ON {t.tabla} WITH (DROP_EXISTING = ON) {destino};")
+
+        no_alineados = s.consulta(
+            "SELECT i.name FROM sys.indexes i JOIN sys.data_spaces ds ON ds.data_space_id = i.data_space_id "
+            "WHERE i.object_id = OBJECT_ID(?) AND i.index_id > 1 AND ds.type <> 'PS'",
+            t.tabla,
+        )
+        for (idx,) in no_alineados:
+            print(f"-- AVISO: el índice {idx} no está alineado; SWITCH fallará hasta recrearlo en {t.ps}")
+
+    for sql in t.ddl_archivo():
+        s.ejecutar(sql)
+    s.confirmar()
+
+def deslizar(s, t, hoy, meses_vivos, meses_adelante):
+    print(f"\n-- ===== {t.tabla} =====")
+    desde, deseadas = t.ventana(hoy, meses_vivos, meses_adelante)
+    limite = desde.year * 10000 + desde.month * 100 if t.tipo_llave == "INT" else desde
+    actuales = fronteras_actuales(s, t)
+    if not actuales:
+        raise RuntimeError(f"{t.pf} no existe; primero ejecuta 'aplicar'.")
+
+    # 1) semanas nuevas: SPLIT al final (particiones vacías -> solo metadatos)
+    for v in deseadas:
+        if v > actuales[-1]:
+            s.ejecutar(f"ALTER PARTITION SCHEME {t.ps} NEXT USED [{FILEGROUP}];")
+            s.ejecutar(f"ALTER PARTITION FUNCTION {t.pf}() SPLIT RANGE ({t.literal(v)});")
+
+    # 2) semanas viejas: la partición que sigue a las fijas sale por SWITCH, se copia al
+    #    archivo y su frontera se funde; al final se vacía la que queda antes de la ventana
+    viejas = [v for v in actuales if v not in t.fijas and v < limite]
+    if viejas:
+        particion = len(t.fijas) + 1
+        s.ejecutar(f"IF OBJECT_ID(N'{t.salida}', 'U') IS NOT NULL DROP TABLE {t.salida};")
+        s.ejecutar(f"SELECT TOP 0 * INTO {t.salida} FROM {t.tabla};")
+        s.ejecutar(f"CREATE CLUSTERED COLUMNSTORE INDEX CCI_{t.nombre}_Salida ON {t.salida};")
+
+        def sacar():
+            s.ejecutar(f"ALTER TABLE {t.tabla} SWITCH PARTITION {particion} TO {t.salida};")
+            s.ejecutar(f"INSERT INTO {t.archivo} WITH (TABLOCK) SELECT * FROM {t.salida};")
+            s.ejecutar(f"TRUNCATE TABLE {t.salida};")
+
+        for v in viejas:
+            sacar()
+            s.ejecutar(f"ALTER PARTITION FUNCTION {t.pf}() MERGE RANGE ({t.literal(v)});")
+        sacar()
+        s.ejecutar(f"DROP TABLE {t.salida};")
+    else:
+        print(f"-- {t.tabla}: nada que archivar antes de {desde.isoformat()}")
+    s.confirmar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crea/migra tablas particionadas por semana con columnstore.")
+    parser.add_argument("accion", choices=["script", "aplicar", "deslizar"])
+    parser.add_argument("--server", default=DEFAULT_SQL_SERVER)
+    parser.add_argument("--port", default=DEFAULT_SQL_PORT)
+    parser.add_argument("--database", default=SQL_DB)
+    parser.add_argument("--user", default=SQL_USER)
+    parser.add_argument("--password", default=os.environ.get("IDEAL_SQL_PWD"))
+    parser.add_argument("--tablas", nargs="*", help="subconjunto (p. ej. dbo.Datos_Integrales)")
+    parser.add_argument("--meses-vivos", type=int, default=MESES_VIVOS)
+    parser.add_argument("--meses-adelante", type=int, default=MESES_ADELANTE)
+    parser.add_argument("--simular", action="store_true", help="imprime el T-SQL y revierte")
+    args = parser.parse_args(argv)
+
+    objetivo = tablas_objetivo()
+    if args.tablas:
+        pedidas = {x.lower() for x in args.tablas}
+        objetivo = [t for t in objetivo if t.tabla.lower() in pedidas or t.nombre.lower() in pedidas]
+    hoy = date.today()
+
+    if args.accion == "script":
+        for t in objetivo:
+            print(f"\n-- ===== {t.tabla} =====")
+            print("\nGO\n".join(t.script_creacion(hoy, args.meses_vivos, args.meses_adelante)))
+            print("GO")
+        return 0
+
+    import pyodbc
+    juntar = sys.modules["juntar_archivos_final"]
+    password = args.password or getpass.getpass(f"Contraseña SQL ({args.user}): ")
+    conn = pyodbc.connect(
+        juntar.build_conn_str(args.server, args.port, args.database, args.user, password),
+        autocommit=False,
+    )
+    sesion = Sesion(conn, args.simular)
+    paso = aplicar if args.accion == "aplicar" else deslizar
+    try:
+        for t in objetivo:
+            paso(sesion, t, hoy, args.meses_vivos, args.meses_adelante)
+    except pyodbc.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
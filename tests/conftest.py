@@ -0,0 +1,23 @@
+import os
+import sys
+import importlib.machinery
+import importlib.util
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)  # los módulos comparten helpers del mismo directorio (comisiones_sql, fusionar…)
+
+
+def cargar_juntar():
+    # Juntar_Archivos_FINAL no tiene extensión .py: se carga con un loader explícito
+    loader = importlib.machinery.SourceFileLoader("juntar_archivos_final", os.path.join(RAIZ, "Juntar_Archivos_FINAL"))
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    modulo = importlib.util.module_from_spec(spec)
+    loader.exec_module(modulo)
+    return modulo
+
+
+@pytest.fixture(scope="session")
+def juntar():
+    return cargar_juntar()
@@ -0,0 +1,57 @@
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+
+import numpy as np
+import pandas as pd
+import pytest
+
+TEXTOS = [
+    # empates en la última posición (HALF_UP: se alejan del cero)
+    "0.005", "0.015", "1.005", "2.675", "0.125", "1234.565", "0.5", "1.5", "2.5",
+    "-0.005", "-1.005", "-2.675", "-0.125", "-0.5", "-2.5",
+    # negativos y formatos que el cargador limpia
+    "-0.0", "-1,234.565", "-$3.255", " 12.3449 ", "50%", "-7", "+7", ".5", "5.",
+    # NULL
+    None, "", "nan", "NaN", "None", "null", "n/a", "abc",
+    # fuera de rango para DECIMAL(18, 2) / DECIMAL(10, 0)
+    "9999999999999999.994", "9999999999999999.995", "-9999999999999999.995",
+    "9999999999.4", "9999999999.5", "1e16", "-1e16",
+]
+FLOTANTES = [
+    1.005, 2.675, 0.125, 1.115, 8.345, 0.285, -1.005, -2.675, -0.125, 0.5, 2.5, -2.5,
+    -0.0, 123456.785, np.nan, np.inf, -np.inf, 9999999999.5, 9999999999999999.0, 1e16, -1e16, 1e20,
+]
+
+
+def _referencia(v, prec, scale):
+    """Decimal.quantize(ROUND_HALF_UP) sobre el texto (repr en flotantes); None si no cabe en DECIMAL(prec, scale).
+    Sin dígitos enteros (prec == scale) todo es None, igual que to_decimal_or_none."""
+    if v is None or (isinstance(v, float) and not np.isfinite(v)) or prec - scale <= 0:
+        return None
+    s = str(v).strip().replace(",", "").replace("%", "").replace("$", "")
+    try:
+        d = Decimal(s)
+    except InvalidOperation:
+        return None
+    if not d.is_finite():
+        return None
+    d = d.quantize(Decimal(1).scaleb(-scale), rounding=ROUND_HALF_UP)
+    return d if abs(d) < Decimal(10) ** (prec - scale) else None
+
+
+@pytest.mark.parametrize("prec,scale", [(18, 2), (10, 0), (5, 5), (19, 4), (12, 6)])
+@pytest.mark.parametrize("valores,dtype", [(TEXTOS, object), (FLOTANTES, "float64")], ids=["texto", "float"])
+def test_igual_que_decimal_quantize(juntar, valores, dtype, prec, scale):
+    col = juntar.decimal_column_to_scaled(pd.Series(valores, dtype=dtype), prec=prec, scale=scale)
+    obtenido = col.decimals(0, len(valores))
+    esperado = [_referencia(v, prec, scale) for v in valores]
+    for v, o, e in zip(valores, obtenido, esperado):
+        assert (o is None) == (e is None) and o == e, (v, o, e)
+
+
+def test_empates_y_rango(juntar):
+    col = juntar.decimal_column_to_scaled(
+        pd.Series(["1.005", "-1.005", "2.5", "9999999999999999.995", None], dtype=object), prec=18, scale=2
+    )
+    assert col.decimals(0, 5) == [Decimal("1.01"), Decimal("-1.01"), Decimal("2.50"), None, None]
+    # los lotes se materializan por rango: el mismo resultado partido en dos
+    assert col.decimals(0, 2) + col.decimals(2, 5) == col.decimals(0, 5)
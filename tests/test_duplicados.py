@@ -0,0 +1,63 @@
+import random
+
+import pandas as pd
+
+from comisiones_comun import FiltroDuplicados, fila_sin_duplicar, LLAVES_DUPLICADOS
+
+
+def _filas(semilla, n=3000):
+    rng = random.Random(semilla)
+    return [
+        [str(rng.randint(1, 400)), rng.choice(["1", "2", 3.0]), rng.choice(["BONO", " BONO ", "RECARGA"]), i]
+        for i in range(n)
+    ]
+
+
+def _leer(filas, filtro):
+    """Igual que xlsb_a_dataframe: descarta al leer y deja la pasada final a terminar()."""
+    headers = ["linea", "periodo_participacion", "tipo_comision", "orden"]
+    es_nueva = fila_sin_duplicar(filtro, headers)
+    conservadas = [f for f in filas if es_nueva(f)]
+    df = pd.DataFrame(
+        [[float(f[0]), float(f[1]), str(f[2]).strip(), f[3]] for f in conservadas],
+        columns=LLAVES_DUPLICADOS + ["orden"],
+    )
+    return filtro.terminar(df)
+
+
+def test_apagado_por_defecto_carga_todo():
+    filas = _filas(0)
+    df = _leer(filas, FiltroDuplicados())
+    assert len(df) == len(filas)
+    assert df.attrs["duplicados"] == 0
+
+
+def test_descarta_repetidas_y_se_queda_la_primera():
+    filas = _filas(1)
+    df = _leer(filas, FiltroDuplicados(True))
+    esperado = pd.DataFrame(
+        [[float(f[0]), float(f[1]), str(f[2]).strip(), f[3]] for f in filas],
+        columns=LLAVES_DUPLICADOS + ["orden"],
+    ).drop_duplicates(subset=LLAVES_DUPLICADOS, keep="first")
+    assert df["orden"].tolist() == esperado["orden"].tolist()
+    assert df.attrs["duplicados"] == len(filas) - len(esperado)
+
+
+def test_set_lleno_da_el_mismo_resultado():
+    # ~10 llaves de tope: casi todo cae en la pasada final con drop_duplicates
+    for semilla in range(5):
+        filas = _filas(semilla)
+        completo = _leer(filas, FiltroDuplicados(True))
+        filtro = FiltroDuplicados(True, memoria_mb=0.002)
+        acotado = _leer(filas, filtro)
+        assert filtro.desbordado
+        assert acotado["orden"].tolist() == completo["orden"].tolist()
+        assert acotado.attrs["duplicados"] == completo.attrs["duplicados"]
+
+
+def test_fila_sin_linea_no_ocupa_el_set():
+    filtro = FiltroDuplicados(True)
+    es_nueva = fila_sin_duplicar(filtro, ["linea", "periodo_participacion", "tipo_comision"])
+    assert es_nueva([None, "1", "BONO"]) and es_nueva([None, "1", "BONO"])
+    assert es_nueva(["5", "1", "BONO"]) and not es_nueva(["5.0", 1, " BONO"])
+    assert filtro.vistos == {(5.0, 1.0, "BONO")}
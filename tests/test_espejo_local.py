@@ -0,0 +1,100 @@
+from datetime import datetime
+
+import pandas as pd
+
+import espejo_local
+from comisiones_comun import periodo_semana
+
+TABLA = "dbo.Datos_Comisiones_Iniciales"
+
+
+def _comisiones(archivo, lineas, monto=10.5):
+    # columnas con el mayúsculas/minúsculas de Datos_Comisiones_*; el espejo no las distingue
+    return pd.DataFrame({
+        "Linea": lineas,
+        "Fecha_Portacion": [pd.Timestamp("2025-01-20")] * len(lineas),
+        "Tipo_Comision": ["BONO"] * len(lineas),
+        "Monto": [monto] * len(lineas),
+        "Periodo_Participacion": [202501] * len(lineas),
+        "Archivo": [archivo] * len(lineas),
+    })
+
+
+def _maestro(lineas, plan):
+    return pd.DataFrame({
+        "LINEA": lineas,
+        "PLAN": [plan] * len(lineas),
+        "FECHA_PRIM_ING": [pd.Timestamp("2025-01-03")] * len(lineas),
+    })
+
+
+def test_periodo_semana_compartido():
+    assert periodo_semana("ENERO 2025 SEM 04 - INICIALES") == 20250104
+    assert periodo_semana("DICIEMBRE 2024 SEM 01 - OP") == 20241201
+    assert periodo_semana("reporte suelto.xlsb") == 0
+    assert periodo_semana(None) == 0
+
+
+def test_registrar_comisiones(tmp_path):
+    ruta = str(tmp_path / "espejo.sqlite")
+    assert espejo_local.registrar_comisiones(_comisiones("ENERO 2025 SEM 04 - INICIALES", [1, 2, 3]), TABLA, ruta=ruta) == 3
+    assert espejo_local.registrar_comisiones(_comisiones("sin periodo.xlsb", [3], monto=1.0), TABLA, ruta=ruta) == 1
+    assert espejo_local.registrar_comisiones(pd.DataFrame(), TABLA, ruta=ruta) == 0
+
+    conn = espejo_local.abrir(ruta)
+    try:
+        filas = conn.execute(
+            "SELECT linea, periodo, tabla, tipo_comision, monto, fecha_portacion, carrier "
+            "FROM comisiones ORDER BY periodo IS NULL, linea"
+        ).fetchall()
+    finally:
+        conn.close()
+    assert filas == [
+        (1, 20250104, TABLA, "BONO", 10.5, "2025-01-20 00:00:00", None),
+        (2, 20250104, TABLA, "BONO", 10.5, "2025-01-20 00:00:00", None),
+        (3, 20250104, TABLA, "BONO", 10.5, "2025-01-20 00:00:00", None),
+        (3, None, TABLA, "BONO", 1.0, "2025-01-20 00:00:00", None),   # sin periodo -> NULL, no 0
+    ]
+
+    semanal = espejo_local.agregado_semanal(tabla=TABLA, desde=20250101, ruta=ruta)
+    assert semanal.to_dict("records") == [
+        {"periodo": 20250104, "tabla": TABLA, "registros": 3, "lineas": 3, "monto": 31.5},
+    ]
+
+
+def test_registrar_maestro_conserva_los_ultimos_cortes(tmp_path, monkeypatch):
+    ruta = str(tmp_path / "espejo.sqlite")
+    monkeypatch.setattr(espejo_local, "ESPEJO_CORTES_MAESTRO", 2)
+    cortes = [datetime(2025, 1, d, 8, 0) for d in (6, 13, 20)]
+    for i, corte in enumerate(cortes):
+        assert espejo_local.registrar_maestro(_maestro([1, 2], f"PLAN {i}"), corte=corte, ruta=ruta) == 2
+    # un corte con una columna nueva la agrega a la tabla sin perder las anteriores
+    extra = _maestro([1], "PLAN 3").assign(REGION="R9")
+    espejo_local.registrar_maestro(extra, corte=datetime(2025, 1, 27, 8, 0), ruta=ruta)
+
+    info = espejo_local.resumen(ruta=ruta)
+    assert info["cortes_maestro"] == [("2025-01-27 08:00:00", 1), ("2025-01-20 08:00:00", 2)]
+
+    conn = espejo_local.abrir(ruta)
+    try:
+        periodos = conn.execute("SELECT DISTINCT corte, periodo FROM maestro ORDER BY corte").fetchall()
+    finally:
+        conn.close()
+    assert periodos == [("2025-01-20 08:00:00", 20250103), ("2025-01-27 08:00:00", 20250104)]
+
+
+def test_historial_linea(tmp_path):
+    ruta = str(tmp_path / "espejo.sqlite")
+    espejo_local.registrar_comisiones(_comisiones("FEBRERO 2025 SEM 02 - INICIALES", [7, 8]), TABLA, ruta=ruta)
+    espejo_local.registrar_comisiones(_comisiones("ENERO 2025 SEM 04 - INICIALES", [7]), TABLA, ruta=ruta)
+    espejo_local.registrar_maestro(_maestro([7, 8], "PLAN A"), corte=datetime(2025, 2, 3), ruta=ruta)
+    espejo_local.registrar_maestro(_maestro([7], "PLAN B"), corte=datetime(2025, 2, 10), ruta=ruta)
+
+    comisiones, maestro = espejo_local.historial_linea("7", ruta=ruta)
+    assert comisiones["periodo"].tolist() == [20250104, 20250202]
+    assert set(comisiones["linea"]) == {7}
+    assert maestro["PLAN"].tolist() == ["PLAN B", "PLAN A"]      # corte más reciente primero
+    assert maestro["FECHA_PRIM_ING"].tolist() == ["2025-01-03 00:00:00"] * 2
+
+    comisiones, maestro = espejo_local.historial_linea(99, ruta=ruta)
+    assert comisiones.empty and maestro.empty
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from test_master_engines import _partes
+
+
+@pytest.fixture
+def stage_dir(juntar, tmp_path, monkeypatch):
+    monkeypatch.setattr(juntar, "STAGE_DIR", str(tmp_path / "etapas"))
+    return juntar.new_stage_dir()
+
+
+def test_partes_y_maestro_pasan_por_disco_sin_cambios(juntar, stage_dir):
+    rep, ci, rec, bp = _partes(juntar, [0, 1, 2, 3, 4, 5, 1, 4])
+    rep["FECHA_ALTA"] = [datetime(2025, 1, 2), "16/04/2025", 45000, None, np.nan, 3.5, "x", 7]
+    partes = {"reporte": rep, "ci": ci, "rec": rec, "bp": bp}
+
+    rutas = juntar.stage_frames(stage_dir, partes)
+    leidas = {n: juntar.read_stage(r) for n, r in rutas.items()}
+    for n, df in partes.items():
+        pd.testing.assert_frame_equal(leidas[n], df)
+        for col in df.columns:
+            assert [type(v) for v in leidas[n][col]] == [type(v) for v in df[col]], (n, col)
+
+    maestro = juntar.build_master(*partes.values())
+    assert juntar.build_master(*leidas.values()).equals(maestro)
+
+    ruta = juntar.stage_frames(stage_dir, {"maestro": maestro})["maestro"]
+    leido = juntar.read_stage(ruta)
+    pd.testing.assert_frame_equal(leido, maestro)
+    # columnas numéricas sin nulos: vista del archivo mapeado (solo lectura), no una copia
+    assert not leido["INGRESO_TOTAL"].to_numpy().flags.writeable
+
+
+def test_sin_carpeta_no_hay_etapas(juntar):
+    assert juntar.stage_frames(None, {"x": pd.DataFrame({"a": [1]})}) is None
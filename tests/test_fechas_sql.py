@@ -0,0 +1,45 @@
+import pandas as pd
+
+FECHAS = [
+    "16/04/2025", "2025-03-15 10:00:00", "45000", None, "2025-05-01",
+    "01/02/2025", "no es fecha", "2024-11-30", "", "45000.5",
+]
+
+
+def _iso(col):
+    return col.chunk(0, len(col.iso)).tolist()
+
+
+def test_fechas_no_dependen_del_bloque(juntar):
+    completa = _iso(juntar.datetime_column_to_iso(pd.Series(FECHAS, dtype=object), "datetime"))
+    for tam in (1, 3, 4):
+        por_bloques = []
+        for i in range(0, len(FECHAS), tam):
+            bloque = pd.Series(FECHAS[i:i + tam], dtype=object)
+            por_bloques += _iso(juntar.datetime_column_to_iso(bloque, "datetime"))
+        assert por_bloques == completa, tam
+
+    assert completa == [
+        "2025-04-16T00:00:00", "2025-03-15T10:00:00", "2023-03-15T00:00:00", None, "2025-05-01T00:00:00",
+        "2025-01-02T00:00:00", None, "2024-11-30T00:00:00", None, "2023-03-15T12:00:00",
+    ]
+
+
+def test_csv_en_streaming_igual_que_completo(juntar, tmp_path):
+    df = pd.DataFrame({h: None for h in juntar.MASTER_HEADERS}, index=range(len(FECHAS)))
+    df["LINEA"] = [str(5500000000 + i) for i in range(len(FECHAS))]
+    df["FECHA_PRIM_ING"] = FECHAS
+    ruta = tmp_path / "MAESTRO.csv"
+    df.to_csv(ruta, index=False, encoding="utf-8-sig")
+
+    info = {"Fecha_Primer_Ing": {"type": "date"}, "Linea": {"type": "varchar"}}
+    rename = {"FECHA_PRIM_ING": "Fecha_Primer_Ing", "LINEA": "Linea"}
+    completo, tipadas = juntar._prepare_frame(next(juntar.iter_master_csv(str(ruta), chunk_rows=100)), info, rename)
+    esperado = _iso(tipadas["Fecha_Primer_Ing"])
+
+    obtenido = []
+    for bloque in juntar.iter_master_csv(str(ruta), chunk_rows=3):
+        _, t = juntar._prepare_frame(bloque, info, rename)
+        obtenido += _iso(t["Fecha_Primer_Ing"])
+    assert obtenido == esperado
+    assert esperado[:3] == ["2025-04-16", "2025-03-15", "2023-03-15"]
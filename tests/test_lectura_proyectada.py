@@ -0,0 +1,54 @@
+import math
+
+import pandas as pd
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _libro(ruta):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Hoja"
+    ws.append(["LINEA", "MONTO", "ESTATUS", "IGNORADA"])
+    ws.append([5512345678, 10.0, "PAGADA", "x"])
+    ws.append([5512345679, 2.5, "#DIV/0!", "x"])
+    ws.append([5512345680, "#N/A", "#VALUE!", "x"])
+    ws.append([None, None, None, "x"])
+    ws.append([5512345681, 7, "NA", "x"])
+    ws.append([5512345682, 1, "#DIV/0!", "x"])
+    ws.cell(row=ws.max_row, column=3).data_type = "s"   # texto capturado, no una celda de error
+    wb.save(ruta)
+
+
+def test_proyectada_igual_que_pandas(juntar, tmp_path):
+    ruta = str(tmp_path / "reporte.xlsx")
+    _libro(ruta)
+    pedidas = ["LINEA", "MONTO", "ESTATUS"]
+
+    proyectada = juntar.read_excel_projected(ruta, "Hoja", pedidas)
+    pandas = pd.read_excel(ruta, sheet_name="Hoja", dtype=object, usecols=pedidas)
+
+    assert list(proyectada.columns) == list(pandas.columns)
+    assert proyectada.shape == pandas.shape
+    for col in pedidas:
+        a = proyectada[col].tolist()
+        b = pandas[col].tolist()
+        assert [None if pd.isna(v) else v for v in a] == [None if pd.isna(v) else v for v in b], col
+    # celda de error -> NaN, texto que parece error -> se conserva (igual que pd.read_excel)
+    estatus = proyectada["ESTATUS"].tolist()
+    assert pd.isna(estatus[1]) and pd.isna(estatus[2])
+    assert estatus[-1] == "#DIV/0!"
+
+
+def test_convertir_celda(juntar):
+    conv = juntar._convert_cell_value
+    assert conv(3.0) == 3 and isinstance(conv(3.0), int)
+    assert conv(2.5) == 2.5
+    assert conv(float("inf")) == math.inf
+    assert conv(float("-inf")) == -math.inf
+    assert conv(float("nan")) is None
+    assert conv("#DIV/0!") == "#DIV/0!"
+    assert conv("#N/A") is None
+    assert conv("n/a") is None
+    assert conv(None) is None
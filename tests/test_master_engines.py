@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+
+def _partes(juntar, orden_reporte):
+    """Partes del MAESTRO con fechas en formatos mezclados, LINEA repetida y filas sin match."""
+    lineas = ["1", "2", "3", "4", "5", "6"]
+    rep = pd.DataFrame({
+        "LINEA": [lineas[i] for i in orden_reporte],
+        "PROMOTOR": [f"P{i}" for i in orden_reporte],
+    })
+    # "5" y "6" no están en CI; "2" viene dos veces (el merge duplica el renglón del reporte)
+    ci = pd.DataFrame({
+        "LINEA": ["1", "2", "3", "4", "2"],
+        "FECHA_PRIM_ING": ["01/02/2025", "2025-03-15", "45000", None, "2024-11-30 10:00:00"],
+        "MES_COM_INIC": [None, "Foo", np.nan, "diciembre ", None],
+        "MONTO_COM_INIC": ["1,234.50", "50%", None, "abc", 7],
+        "ESTATUS_COMISION_INICIAL": ["PAGADA", "RECHAZADA", None, "PAGADA", "PAGADA"],
+    })
+    rec = pd.DataFrame({"LINEA": ["1", "2", "3", "5"]})
+    for pp in juntar.PP_LIST:
+        rec[f"ESTATUS_REC_PP{pp}"] = ["OK", "", None, " OK"]
+        rec[juntar.PP_MONTO_COL[pp]] = [10.5, "20", None, ""]
+        rec[juntar.PP_REC_TOTAL_COL[pp]] = [100.25, None, "3,000", "nan"]
+    bp = pd.DataFrame({
+        "LINEA": ["2", "4", "6"],
+        "ESTATUS_BP1": ["X", None, "X"],
+        "MONTO_BP1": [1.0, None, None],
+        "PP_BP1": [2, 2, None],
+    })
+    return rep, ci, rec, bp
+
+
+@pytest.mark.parametrize("semilla", range(6))
+def test_duckdb_igual_a_pandas(juntar, semilla):
+    orden = np.random.default_rng(semilla).permutation([0, 1, 2, 3, 4, 5, 1, 4])
+    partes = _partes(juntar, orden)
+    assert juntar.compare_master_engines(*partes) == {}
+
+
+def test_fecha_prim_ing_en_orden_del_merge(juntar):
+    # to_datetime infiere el formato con el primer texto no nulo: el orden del reporte decide
+    rep, ci, rec, bp = _partes(juntar, [1, 0, 2])
+    esperado = juntar.build_master_pandas(rep, ci, rec, bp)
+    obtenido = juntar.build_master_duckdb(rep, ci, rec, bp)
+    col = juntar.PP_MES_COL[1]
+    assert esperado[col].where(esperado[col].notna(), None).tolist() == obtenido[col].tolist()
@@ -0,0 +1,56 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("polars")
+
+import fusionar  # noqa: E402  (conftest agrega la raíz del repo a sys.path)
+
+VACIOS = ["", " ", "nan", "NAN", "Nan", " nan", "NULL", "none", "N/A"]
+
+
+def _valor(rng, col):
+    r = rng.random()
+    if r < 0.35:
+        return None
+    if r < 0.45:
+        return rng.choice(VACIOS)
+    if col.startswith("FECHA"):
+        return rng.choice([str(rng.randint(44000, 46000)), f"{rng.randint(44000, 46000)}.{rng.randint(0, 99)}",
+                           f"2025-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}", "basura", "12"])
+    if "MONTO" in col or "PCTJE" in col or "TOTAL" in col:
+        return rng.choice([f"{rng.uniform(0, 999):.2f}", f"{rng.uniform(0, 99):.1f}%", "1,234.5", " 12 ", "inf"])
+    return rng.choice(["A", "B", "RECHAZO", "ENERO"])
+
+
+def _maestros(tmp_path, semilla, archivos=3, filas=400):
+    rng = random.Random(semilla)
+    columnas = (["LINEA", "NOMBRE"] + fusionar.DATE_PRIORITY_COLS
+                + sum([fusionar.pp_block_cols(pp) for pp in fusionar.PP_LIST], [])
+                + fusionar.BP1_COLS + fusionar.BP2_COLS + ["MONTO_COM_INIC", "INGRESO_TOTAL"])
+    rutas = []
+    for k in range(archivos):
+        cols = [c for c in columnas if c == "LINEA" or rng.random() < 0.9]
+        filas_k = [[str(rng.randint(1, filas // 2)) if c == "LINEA" else _valor(rng, c) for c in cols]
+                   for _ in range(filas)]
+        ruta = tmp_path / f"maestro_{k}.csv"
+        pd.DataFrame(filas_k, columns=cols).to_csv(ruta, index=False, encoding="utf-8-sig")
+        rutas.append(str(ruta))
+    return rutas
+
+
+@pytest.mark.parametrize("semilla", range(4))
+def test_polars_igual_a_pandas(tmp_path, semilla):
+    rutas = _maestros(tmp_path, semilla)
+    a = fusionar.merge_masters(rutas, engine="pandas")
+    b = fusionar.merge_masters(rutas, engine="polars")
+
+    assert list(a.columns) == list(b.columns)
+    assert len(a) == len(b)
+    ingreso_a = a["INGRESO_TOTAL"].astype(float).to_numpy()
+    ingreso_b = b["INGRESO_TOTAL"].astype(float).to_numpy()
+    assert not np.isnan(ingreso_b).any()
+    assert np.allclose(ingreso_a, ingreso_b, rtol=1e-12, atol=0, equal_nan=True)
+    assert a.to_csv(index=False) == b.to_csv(index=False)
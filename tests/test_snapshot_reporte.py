@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+pytest.importorskip("pyarrow")
+
+
+def _reporte(ruta):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["LÍNEA", "FECHA PORTIN", "FECHA ACTIVACIÓN", "APSI PROMOTOR", "NOMBRE PROMOTOR", "REGIÓN"])
+    ws.append([5512345678, datetime(2025, 3, 15), 45700, 1234, "ANA", 9])
+    ws.append(["5512345679", "16/04/2025", "2025-02-01", "0042", "LUIS", "R9"])
+    ws.append([5512345680.0, "2025-05-01", None, 77.5, None, None])
+    ws.append([5512345681, None, datetime(2025, 1, 2, 10, 30), None, "EVA", 3])
+    ws.append([5512345678, datetime(2025, 6, 1), 45800, 99, "ANA", 9])   # duplicada: se queda la última
+    wb.save(ruta)
+
+
+def test_snapshot_igual_que_corrida_en_frio(juntar, tmp_path, monkeypatch):
+    monkeypatch.setattr(juntar, "CACHE_DIR", str(tmp_path / "cache"))
+    ruta = str(tmp_path / "Reporte Acumulado.xlsx")
+    _reporte(ruta)
+
+    frio, stats_frio = juntar.load_reporte_out(ruta)
+    cache, stats_cache = juntar.load_reporte_out(ruta)
+    assert stats_cache == "snapshot en caché (sin leer Excel)"
+    assert stats_frio != stats_cache
+
+    pd.testing.assert_frame_equal(cache, frio)
+    for col in frio.columns:
+        assert [type(v) for v in cache[col]] == [type(v) for v in frio[col]], col
+
+    # lo que importa aguas abajo: las fechas convierten igual con y sin caché
+    for col in ("FECHA_PRIM_ING", "FECHA_ACTIVACION"):
+        pd.testing.assert_series_equal(
+            juntar.excel_serial_to_datetime(cache[col]), juntar.excel_serial_to_datetime(frio[col])
+        )
+    assert isinstance(cache["FECHA_PRIM_ING"].iloc[-1], datetime)   # no regresa como texto
+
+
+def test_snapshot_se_renueva_si_cambia_el_archivo(juntar, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(juntar, "CACHE_DIR", str(cache_dir))
+    ruta = str(tmp_path / "Reporte Acumulado.xlsx")
+    _reporte(ruta)
+    juntar.load_reporte_out(ruta)
+
+    wb = openpyxl.load_workbook(ruta)
+    wb.active.append([5512345699, "2025-07-01", None, 5, "NUEVO", 1])
+    wb.save(ruta)
+    df, stats = juntar.load_reporte_out(ruta)
+    assert stats != "snapshot en caché (sin leer Excel)"
+    assert "5512345699" in set(df["LINEA"])
+    assert len(list(cache_dir.iterdir())) == 1
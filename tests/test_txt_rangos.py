@@ -0,0 +1,89 @@
+import os
+import importlib.util
+
+import pandas as pd
+import pytest
+
+from comisiones_comun import FiltroDuplicados
+
+TIPO = "INICIALES"
+ARCHIVO = "ENERO 2025 SEM 04 - INICIALES"
+
+
+@pytest.fixture(scope="module")
+def sep():
+    # el cargador importa pyodbc, pyxlsb y PIL al cargar: sin ellos no hay módulo que probar
+    # (pyodbc instalado sin el driver ODBC del sistema falla con ImportError, no ModuleNotFoundError)
+    for dep in ("pyodbc", "pyxlsb", "PIL"):
+        pytest.importorskip(dep, exc_type=ImportError)
+    ruta = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Cargar_Comisiones_Separación.py")
+    spec = importlib.util.spec_from_file_location("cargar_comisiones_separacion", ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def _linea(i, fecha="2025-01-15", promotor="PROMOTOR"):
+    campos = [
+        str(5500000000 + i % 17), fecha, "", "PAGADA", "", "BONO" if i % 3 else "RECARGA", f"{i}.50", "FV",
+        "CARRIER", "ARCH", str(i % 4 + 1), "10%", "", "9", str(1000 + i), promotor, "SUP", "GRUPO", "COORD",
+        "77", "", "", str(2000 + i),
+    ]
+    return "/".join(campos)
+
+
+def _contenido():
+    lineas = [_linea(i) for i in range(30)]
+    lineas[7] = _linea(7, fecha="")                        # rangos sin fecha: el dtype se infiere al juntar
+    lineas[8] = _linea(8, fecha="")
+    lineas[12] = _linea(12, promotor='"PEREZ\nLOPEZ / JR"')  # campo entrecomillado con salto y separador
+    lineas[20] = _linea(20, promotor='"GARCÍA\r\nRUIZ"')
+    cuerpo = "\r\n".join(lineas[:10]) + "\r\n" + "\n".join(lineas[10:25]) + "\r" + "\n".join(lineas[25:])
+    return ("\n" + cuerpo).encode("latin1")               # línea vacía al inicio; la última sin salto
+
+
+def _serial(sep, ruta, quitar_duplicados):
+    """La lectura original: open() en modo texto, línea por línea."""
+    filtro = FiltroDuplicados(quitar_duplicados)
+    filas = []
+    with open(ruta, encoding="latin1", errors="replace") as f:
+        for raw in f:
+            fila = sep.txt_fila(raw, TIPO, ARCHIVO, filtro)
+            if fila is not None:
+                filas.append(fila)
+    df = filtro.terminar(pd.DataFrame(filas))
+    return df, filtro.descartados
+
+
+@pytest.fixture
+def txt(tmp_path):
+    ruta = tmp_path / "comisiones.txt"
+    ruta.write_bytes(_contenido())
+    return str(ruta)
+
+
+def test_rangos_cubren_el_archivo_y_cortan_en_salto(sep, txt):
+    with open(txt, "rb") as f:
+        datos = f.read()
+    for partes in (1, 2, 5, 13, 40, len(datos)):
+        rangos = sep.txt_rangos(txt, partes)
+        assert rangos[0][0] == 0 and rangos[-1][1] == len(datos)
+        assert all(a[1] == b[0] for a, b in zip(rangos, rangos[1:]))
+        assert all(datos[fin - 1:fin] == b"\n" for _, fin in rangos[:-1])
+
+
+@pytest.mark.parametrize("quitar_duplicados", [False, True])
+def test_rangos_igual_que_lectura_serial(sep, txt, monkeypatch, quitar_duplicados):
+    esperado, descartados = _serial(sep, txt, quitar_duplicados)
+    assert len(esperado) > 20
+
+    # bloques internos de 1 byte: cada línea también cruza un corte de bloque dentro del rango
+    monkeypatch.setattr(sep, "TXT_BLOQUE_MB", 1 / (1024 * 1024))
+    for partes in (1, 2, 3, 7, 13, 40):
+        pedazos = [
+            sep.txt_leer_rango(txt, inicio, fin, TIPO, ARCHIVO, quitar_duplicados)
+            for inicio, fin in sep.txt_rangos(txt, partes)
+        ]
+        df = sep.txt_juntar(pedazos, quitar_duplicados)
+        pd.testing.assert_frame_equal(df, esperado, check_like=False)
+        assert df.attrs["duplicados"] == descartados
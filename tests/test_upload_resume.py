@@ -0,0 +1,179 @@
+import re
+import threading
+
+import pandas as pd
+import pytest
+
+import comisiones_sql
+
+COLUMNAS = [("Linea", "varchar", None, None), ("Monto", "decimal", 18, 2), ("Fecha_Alta", "date", None, None)]
+TABLA = "dbo.T"
+FILAS = 23000
+FRAME = 5000
+
+
+class Falla(Exception):
+    pass
+
+
+class BaseFalsa:
+    """SQL Server mínimo: tablas y checkpoints confirmados; cada conexión acumula lo pendiente hasta commit."""
+
+    def __init__(self):
+        self.tablas = {}
+        self.checkpoints = {}
+        self.lock = threading.Lock()
+        self.fallar_insert_con = None      # el executemany que trae esta Linea falla
+        self.fallar_commit_con = None      # commit que falla si lleva este avance de checkpoint
+
+    def conectar(self, _conn_str):
+        return ConexionFalsa(self)
+
+
+class ConexionFalsa:
+    def __init__(self, base):
+        self.base = base
+        self.pendiente = []
+
+    def cursor(self):
+        return CursorFalso(self)
+
+    def commit(self):
+        base = self.base
+        for op in self.pendiente:
+            if op[0] == "checkpoint" and op[2][2] == base.fallar_commit_con:
+                self.pendiente = []
+                raise Falla("commit interrumpido")
+        with base.lock:
+            for op in self.pendiente:
+                if op[0] == "filas":
+                    base.tablas.setdefault(op[1], []).extend(op[2])
+                elif op[0] == "checkpoint":
+                    base.checkpoints[op[1]] = op[2]
+                elif op[0] == "borrar":
+                    base.checkpoints.pop(op[1], None)
+        self.pendiente = []
+
+    def rollback(self):
+        self.pendiente = []
+
+    def close(self):
+        pass
+
+
+class CursorFalso:
+    def __init__(self, conn):
+        self.conn = conn
+        self.fast_executemany = False
+        self._fila = None
+        self._filas = []
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        pass
+
+    def execute(self, sql, *params):
+        if len(params) == 1 and isinstance(params[0], (tuple, list)):
+            params = tuple(params[0])
+        base = self.conn.base
+        texto = " ".join(sql.split())
+        if texto.startswith("SELECT CONVERT(varchar(30), modify_date"):
+            self._fila = ("2026-01-01T00:00:00",)
+        elif "INFORMATION_SCHEMA.COLUMNS" in texto:
+            self._filas = list(COLUMNAS)
+        elif texto.startswith("SELECT Tabla, Total, Filas_Confirmadas"):
+            self._fila = base.checkpoints.get(params[0])
+        elif texto.startswith("UPDATE dbo.Checkpoints_Carga"):
+            self.conn.pendiente.append(("checkpoint", params[3], params[:3]))
+        elif texto.startswith("DELETE FROM dbo.Checkpoints_Carga"):
+            self.conn.pendiente.append(("borrar", params[0]))
+        elif re.match(r"INSERT INTO \S+ \(.*\) SELECT .* FROM ##", texto):
+            destino, stage = re.match(r"INSERT INTO (\S+) .* FROM (\S+);", texto).groups()
+            self.conn.pendiente.append(("filas", destino, list(base.tablas.get(stage, []))))
+        elif "DROP TABLE ##" in texto:
+            base.tablas.pop(re.search(r"DROP TABLE (\S+);", texto).group(1), None)
+        return self
+
+    def executemany(self, sql, params):
+        base = self.conn.base
+        params = list(params)
+        if any(fila[0] == base.fallar_insert_con for fila in params):
+            raise Falla("lote interrumpido")
+        self.conn.pendiente.append(("filas", sql.split()[2], params))
+
+    def fetchone(self):
+        return self._fila
+
+    def fetchall(self):
+        return self._filas
+
+
+@pytest.fixture
+def base(juntar, monkeypatch, tmp_path):
+    base = BaseFalsa()
+    monkeypatch.setattr(comisiones_sql, "obtener_conexion", base.conectar)
+    monkeypatch.setattr(juntar, "build_conn_str", lambda *a: "fake")
+    monkeypatch.setattr(juntar, "SQL_SCHEMA_CACHE", juntar.SqlSchemaCache(str(tmp_path / "esquema.json")))
+    yield base
+    comisiones_sql.cerrar_pool()
+
+
+def _frames():
+    df = pd.DataFrame({
+        "Linea": [str(i) for i in range(FILAS)],
+        "Monto": ["1.50"] * FILAS,
+        "Fecha_Alta": ["2025-01-02"] * FILAS,
+    })
+    return (df.iloc[i:i + FRAME] for i in range(0, FILAS, FRAME))
+
+
+def _subir(juntar, workers, resume=False):
+    return juntar.upload_frames_to_sqlserver(
+        _frames(), "pwd", "srv", "1433", "db", TABLA, "sa",
+        total_rows=FILAS, chunk_size=1000, checkpoint_key="clave", resume=resume, workers=workers,
+    )
+
+
+def _lineas(base):
+    # el orden físico no importa (la subida paralela consolida por workers): se compara ordenado
+    return sorted((fila[0] for fila in base.tablas.get(TABLA, [])), key=int)
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_reanudar_tras_falla_en_un_lote(juntar, base, workers):
+    base.fallar_insert_con = "12345"
+    with pytest.raises(Falla):
+        _subir(juntar, workers)
+
+    confirmadas = base.checkpoints["clave"][2]
+    assert 0 < confirmadas <= 12345
+    assert _lineas(base) == [str(i) for i in range(confirmadas)]
+
+    base.fallar_insert_con = None
+    insertadas, _, _ = _subir(juntar, workers, resume=True)
+    assert insertadas == FILAS - confirmadas
+    assert _lineas(base) == [str(i) for i in range(FILAS)]
+    assert "clave" not in base.checkpoints
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_commit_fallido_no_adelanta_filas_ni_checkpoint(juntar, base, workers):
+    # el checkpoint va en la misma transacción que el lote: si el commit falla, no avanza ninguno
+    base.fallar_commit_con = 10000
+    with pytest.raises(Falla):
+        _subir(juntar, workers)
+    assert base.checkpoints["clave"][2] == len(_lineas(base)) < 10000
+
+    base.fallar_commit_con = None
+    _subir(juntar, workers, resume=True)
+    assert _lineas(base) == [str(i) for i in range(FILAS)]
+
+
+def test_sin_resume_empieza_desde_cero(juntar, base):
+    base.checkpoints["clave"] = (TABLA, FILAS, 7000)
+    base.tablas[TABLA] = []
+    insertadas, _, _ = _subir(juntar, 1)
+    assert insertadas == FILAS
+    assert "clave" not in base.checkpoints